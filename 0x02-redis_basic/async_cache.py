@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Asyncio Redis Cache class module.
+
+This module contains an AsyncCache class with the same store and get
+surface as exercise.Cache, built on redis.asyncio so that cache operations
+never block the event loop, and an async replay function.
+"""
+
+import uuid
+import asyncio
+import weakref
+import contextvars
+import redis.asyncio as aioredis
+from typing import (
+    Union, Callable, Optional, Any, Iterable, AsyncIterator, List, Tuple,
+    IO, Dict
+)
+
+from exercise import (
+    call_history, count_calls, _abatched, _chunked, _escape_pattern,
+    _format_args, _history_limits, _history_stream, _record_calls,
+    _record_history, _sampled, _to_str
+)
+from serializer import RawSerializer
+
+
+# Connection pools shared by every AsyncCache created from the same URL,
+# by URL per event loop, since asyncio connections are bound to their loop
+_pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _shared_pool(url: str,
+                 max_connections: int = 50) -> aioredis.ConnectionPool:
+    """
+    Get the running event loop's asyncio connection pool for a Redis URL.
+
+    The pool blocks callers until a connection is free instead of failing,
+    so any number of tasks can share a bounded set of connections. Each
+    event loop gets pools of its own, dropped with the loop.
+
+    Args:
+        url: A redis://, rediss:// or unix:// URL.
+        max_connections: The size of the pool when it is created.
+
+    Returns:
+        aioredis.ConnectionPool: The pool, created on first use.
+    """
+    loop = asyncio.get_running_loop()
+    pools = _pools.get(loop)
+    if pools is None:
+        pools = _pools[loop] = {}
+    pool = pools.get(url)
+    if pool is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            url, max_connections=max_connections
+        )
+        pools[url] = pool
+    return pool
+
+
+class AsyncCache:
+    """
+    Asyncio Cache class for Redis operations.
+
+    Every method is a coroutine. The count_calls and call_history
+    decorators detect the coroutine methods and buffer their writes into
+    the same transaction, tracked per task, so thousands of calls can be
+    in flight on one event loop.
+
+    Attributes:
+        default_url: The Redis URL used when no connection is given.
+        history_maxlen: The maximum number of calls kept by call_history,
+            or None to keep them all.
+        history_sample: Record one in every ``history_sample`` calls.
+        history_stream: Whether call_history writes one stream entry per
+            call instead of the inputs and outputs lists.
+        default_ttl: The expiry in seconds of stored values, or None to
+            keep them until deleted.
+    """
+
+    default_url: str = "redis://localhost:6379/0"
+    history_maxlen: Optional[int] = None
+    history_sample: int = 1
+    history_stream: bool = False
+    default_ttl: Optional[int] = None
+
+    def __init__(self, client: Optional[aioredis.Redis] = None,
+                 url: Optional[str] = None,
+                 pool: Optional[aioredis.ConnectionPool] = None,
+                 namespace: str = "",
+                 serializer: Optional[Any] = None) -> None:
+        """
+        Initialize the AsyncCache instance.
+
+        Connects through an existing client, an explicit pool, or the
+        shared pool for ``url`` (``default_url`` if none is given) of the
+        event loop running each call, so the instance keeps working across
+        several asyncio.run calls. An explicit client or pool is bound to
+        the event loop that first uses it.
+
+        Args:
+            client: An existing redis.asyncio client to use as is.
+            url: A redis:// or unix:// URL whose shared pool is used.
+            pool: A redis.asyncio connection pool to build the client on.
+            namespace: The prefix for every key written by this instance.
+            serializer: How values are encoded, such as TaggedSerializer
+                to get values back with their type (default: raw bytes).
+        """
+        if client is None and pool is not None:
+            client = aioredis.Redis(connection_pool=pool)
+        self._client = client
+        self._url = url or self.default_url
+        # The client of each event loop this instance was used in
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._namespace = namespace
+        self._serializer = serializer or RawSerializer()
+        self._pipe: contextvars.ContextVar = contextvars.ContextVar(
+            f"pipe:{id(self)}", default=None
+        )
+
+    @property
+    def _redis(self) -> aioredis.Redis:
+        """
+        Get the client of this instance for the running event loop.
+
+        Returns:
+            aioredis.Redis: The explicit client, or one on the running
+            loop's shared pool, created on first use in that loop.
+        """
+        if self._client is not None:
+            return self._client
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = aioredis.Redis(connection_pool=_shared_pool(self._url))
+            self._clients[loop] = client
+        return client
+
+    def _key(self, name: str) -> str:
+        """
+        Prefix a key name with the namespace of this instance.
+
+        Args:
+            name: The unprefixed key name.
+
+        Returns:
+            str: The key name as stored in Redis.
+        """
+        return f"{self._namespace}{name}"
+
+    async def reset(self, batch_size: int = 1000,
+                    flush: bool = False) -> int:
+        """
+        Delete every key in the namespace of this instance.
+
+        Args:
+            batch_size: The SCAN page size and the number of keys per UNLINK.
+            flush: Whether an instance without a namespace may flush the
+                whole database.
+
+        Returns:
+            int: The number of keys deleted, or 0 after an asynchronous
+            flush of the whole database (when there is no namespace).
+
+        Raises:
+            ValueError: If the instance has no namespace and ``flush`` is
+                not set.
+        """
+        if not self._namespace:
+            if not flush:
+                raise ValueError("reset without a namespace would flush the "
+                                 "whole database; pass flush=True to do so")
+            await self._redis.flushdb(asynchronous=True)
+            return 0
+        pattern = _escape_pattern(self._namespace) + "*"
+        deleted = 0
+        chunk: List[bytes] = []
+        async for key in self._redis.scan_iter(match=pattern,
+                                               count=batch_size):
+            chunk.append(key)
+            if len(chunk) >= batch_size:
+                deleted += await self._redis.unlink(*chunk)
+                chunk = []
+        if chunk:
+            deleted += await self._redis.unlink(*chunk)
+        return deleted
+
+    @call_history
+    @count_calls
+    async def store(self, data: Union[str, bytes, int, float],
+                    ttl: Optional[int] = None) -> str:
+        """
+        Store data in Redis with a random key.
+
+        Args:
+            data: The data to store. Can be str, bytes, int, or float.
+            ttl: The expiry in seconds (default: ``default_ttl``).
+
+        Returns:
+            str: The random key used to store the data.
+        """
+        key = self._key(str(uuid.uuid4()))
+        async with _abatched(self) as pipe:
+            pipe.set(key, self._serializer.dumps(data),
+                     ex=self.default_ttl if ttl is None else ttl)
+        return key
+
+    async def get(self, key: str, fn: Optional[Callable] = None) -> Any:
+        """
+        Get data from Redis and optionally apply a conversion function.
+
+        Args:
+            key: The key to retrieve data for.
+            fn: Optional callable to convert the data back to desired format.
+
+        Returns:
+            The data from Redis, optionally converted, or None if key
+            doesn't exist.
+        """
+        data = await self._redis.get(key)
+        if data is None:
+            return None
+        data = self._serializer.loads(data)
+        if fn is not None:
+            return fn(data)
+        return data
+
+    async def get_str(self, key: str) -> Optional[str]:
+        """
+        Get data from Redis and convert it to a string.
+
+        Args:
+            key: The key to retrieve data for.
+
+        Returns:
+            The data as a string, or None if key doesn't exist.
+        """
+        return await self.get(key, fn=_to_str)
+
+    async def get_int(self, key: str) -> Optional[int]:
+        """
+        Get data from Redis and convert it to an integer.
+
+        Args:
+            key: The key to retrieve data for.
+
+        Returns:
+            The data as an integer, or None if key doesn't exist.
+        """
+        return await self.get(key, fn=int)
+
+    async def store_many(self, data: Iterable[Union[str, bytes, int, float]],
+                         chunk_size: int = 1000,
+                         ttl: Optional[int] = None) -> List[str]:
+        """
+        Store many values in Redis, one round trip per chunk.
+
+        Args:
+            data: The values to store. Each can be str, bytes, int, or float.
+            chunk_size: The maximum number of values sent per round trip.
+            ttl: The expiry in seconds (default: ``default_ttl``).
+
+        Returns:
+            List[str]: The random keys, in the same order as the values.
+        """
+        qualname = self._key(self.store.__qualname__)
+        limit, rate = _history_limits(self, None, None)
+        if ttl is None:
+            ttl = self.default_ttl
+        keys: List[str] = []
+        for chunk in _chunked(data, chunk_size):
+            mapping = {self._key(str(uuid.uuid4())): item for item in chunk}
+            recorded = [(_format_args((item,)), key)
+                        for key, item in mapping.items() if _sampled(rate)]
+            pipe = self._redis.pipeline()
+            _record_calls(pipe, qualname, len(chunk))
+            writes = {key: self._serializer.dumps(item)
+                      for key, item in mapping.items()}
+            if ttl is not None:
+                for key, payload in writes.items():
+                    pipe.set(key, payload, ex=ttl)
+            else:
+                pipe.mset(writes)
+            _record_history(pipe, qualname,
+                            [inp for inp, _ in recorded],
+                            [out for _, out in recorded], limit,
+                            _history_stream(self))
+            await pipe.execute()
+            keys.extend(mapping)
+        return keys
+
+    async def get_many(self, keys: Iterable[str],
+                       fn: Optional[Callable] = None,
+                       chunk_size: int = 1000) -> List[Any]:
+        """
+        Get many values from Redis in a single pipelined round trip.
+
+        Args:
+            keys: The keys to retrieve data for.
+            fn: Optional callable applied to every value that exists.
+            chunk_size: The maximum number of keys per MGET command.
+
+        Returns:
+            List[Any]: The values in the same order as the keys, with None
+            for keys that don't exist.
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        for chunk in _chunked(keys, chunk_size):
+            pipe.mget(chunk)
+        values = [None if value is None else self._serializer.loads(value)
+                  for chunk in await pipe.execute() for value in chunk]
+        if fn is None:
+            return values
+        return [None if value is None else fn(value) for value in values]
+
+    async def close(self) -> None:
+        """
+        Release the connections of this instance's client.
+        """
+        await self._redis.aclose()
+
+
+async def _history_length(client: Any, base_key: str) -> int:
+    """
+    Get the number of complete input/output pairs in a call history.
+
+    Args:
+        client: The redis.asyncio client holding the history.
+        base_key: The namespaced qualified name of the recorded method.
+
+    Returns:
+        int: The length of the shorter of the two history lists.
+    """
+    pipe = client.pipeline(transaction=False)
+    pipe.llen(f"{base_key}:inputs")
+    pipe.llen(f"{base_key}:outputs")
+    return min(await pipe.execute())
+
+
+async def aiter_history(method: Callable, start: int = 0, stop: int = -1,
+                        chunk: int = 1000) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Stream the recorded calls of a coroutine method in fixed-size pages.
+
+    Args:
+        method: The bound AsyncCache method to read call history for.
+        start: The index of the first call, negative counting from the end.
+        stop: The index of the last call (inclusive), negative counting
+            from the end.
+        chunk: The maximum number of calls fetched per round trip.
+
+    Returns:
+        AsyncIterator[Tuple[str, str]]: The decoded (inputs, output) pairs.
+    """
+    if chunk < 1:
+        raise ValueError("chunk size must be a positive integer")
+    redis_instance = method.__self__._redis
+    base_key = method.__self__._key(method.__qualname__)
+    input_key = f"{base_key}:inputs"
+    output_key = f"{base_key}:outputs"
+
+    length = await _history_length(redis_instance, base_key)
+    if start < 0:
+        start = max(length + start, 0)
+    if stop < 0:
+        stop = length + stop
+    stop = min(stop, length - 1)
+
+    for first in range(start, stop + 1, chunk):
+        last = min(first + chunk - 1, stop)
+        pipe = redis_instance.pipeline(transaction=False)
+        pipe.lrange(input_key, first, last)
+        pipe.lrange(output_key, first, last)
+        inputs, outputs = await pipe.execute()
+        for inp, out in zip(inputs, outputs):
+            yield inp.decode("utf-8"), out.decode("utf-8")
+
+
+async def areplay(method: Callable, file: Optional[IO[str]] = None,
+                  last: Optional[int] = None, chunk: int = 1000) -> None:
+    """
+    Display the history of calls of a particular coroutine method.
+
+    Args:
+        method: The bound AsyncCache method to display call history for.
+        file: The file-like object to write to (default: sys.stdout).
+        last: If set, only display the last ``last`` calls.
+        chunk: The maximum number of calls fetched per round trip.
+    """
+    redis_instance = method.__self__._redis
+    method_name = method.__qualname__
+    base_key = method.__self__._key(method_name)
+
+    count = await redis_instance.get(base_key)
+    count = 0 if count is None else int(count)
+
+    shown = await _history_length(redis_instance, base_key)
+    if last is not None:
+        shown = min(shown, max(last, 0))
+    if shown < count:
+        print(f"{method_name} was called {count} times "
+              f"(showing last {shown}):", file=file)
+    else:
+        print(f"{method_name} was called {count} times:", file=file)
+
+    if shown == 0:
+        return
+    async for input_str, output_str in aiter_history(method, -shown, -1,
+                                                     chunk):
+        print(f"{method_name}(*{input_str}) -> {output_str}", file=file)
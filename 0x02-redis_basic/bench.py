@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the exercise.py and web.py hot paths
+
+Runs against a local redis-server and a local HTTP server answering after
+a fixed delay, reports ops/s, p50 and p99 for every case, and can save the
+results as a baseline or compare a run against one. With --memory it also
+compares the bytes per small value of the plain and compact Cache layouts.
+
+    python3 bench.py --save baseline.json
+    python3 bench.py --baseline baseline.json --tolerance 0.2
+    python3 bench.py --memory 100000
+"""
+import argparse
+import inspect
+import io
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import redis
+
+import web
+from exercise import Cache, replay
+
+ORIGIN_DELAY = 0.005
+
+
+class DelayedHandler(BaseHTTPRequestHandler):
+    """Local origin that answers every GET after ORIGIN_DELAY seconds"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        """Answer with a small page after the delay"""
+        time.sleep(ORIGIN_DELAY)
+        body = b"<html>" + b"x" * 512 + b"</html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the benchmark output quiet"""
+
+
+def measure(fn: Callable[[int], object], number: int,
+            warmup: int = 10) -> Dict[str, float]:
+    """
+    Time ``number`` calls of ``fn`` one by one.
+
+    Args:
+        fn: Called with the iteration index.
+        number: The number of timed calls.
+        warmup: The number of untimed calls made first.
+
+    Returns:
+        Dict[str, float]: ops/s and the p50/p99 latency in microseconds.
+    """
+    for i in range(warmup):
+        fn(i)
+    samples: List[int] = []
+    start = time.perf_counter_ns()
+    for i in range(number):
+        before = time.perf_counter_ns()
+        fn(i)
+        samples.append(time.perf_counter_ns() - before)
+    elapsed = time.perf_counter_ns() - start
+    samples.sort()
+    return {
+        "ops": number / (elapsed / 1e9),
+        "p50": samples[len(samples) // 2] / 1e3,
+        "p99": samples[min(len(samples) - 1,
+                           int(len(samples) * 0.99))] / 1e3,
+    }
+
+
+def run(number: int, history: int) -> Dict[str, Dict[str, float]]:
+    """
+    Run every benchmark case.
+
+    Args:
+        number: The number of timed calls per case.
+        history: The number of calls in the history replayed.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The results by case name.
+    """
+    namespace = f"bench:{uuid.uuid4()}:"
+    cache = Cache(namespace=namespace)
+    undecorated = inspect.unwrap(Cache.store)
+    results: Dict[str, Dict[str, float]] = {}
+
+    try:
+        results["store"] = measure(lambda i: cache.store(i), number)
+        results["store (undecorated)"] = measure(
+            lambda i: undecorated(cache, i), number
+        )
+        keys = cache.store_many(range(number))
+        results["get"] = measure(lambda i: cache.get(keys[i]), number)
+        results["get_str"] = measure(lambda i: cache.get_str(keys[i]),
+                                     number)
+        results["get_int"] = measure(lambda i: cache.get_int(keys[i]),
+                                     number)
+
+        replayed = Cache(namespace=namespace + "replay:")
+        replayed.store_many(range(history))
+        results[f"replay ({history} calls)"] = measure(
+            lambda i: replay(replayed.store, file=io.StringIO()),
+            max(number // 100, 5), warmup=1
+        )
+        replayed.reset()
+    finally:
+        cache.reset()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DelayedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/{uuid.uuid4()}"
+    try:
+        web.get_page(f"{base}/hot")
+        results["get_page (hit)"] = measure(
+            lambda i: web.get_page(f"{base}/hot"), number
+        )
+        results["get_page (miss)"] = measure(
+            lambda i: web.get_page(f"{base}/miss/{i}"),
+            max(number // 10, 10), warmup=0
+        )
+    finally:
+        server.shutdown()
+    return results
+
+
+def measure_memory(count: int, size: int = 16) -> Dict[str, float]:
+    """
+    Measure the server memory taken per value by each storage layout.
+
+    Args:
+        count: The number of values stored per layout.
+        size: The length in bytes of every value.
+
+    Returns:
+        Dict[str, float]: The used_memory growth per value by layout.
+    """
+    client = redis.Redis()
+    results: Dict[str, float] = {}
+    for name, compact in (("uuid keys", False), ("compact", True)):
+        cache = Cache(namespace=f"bench:{uuid.uuid4()}:", compact=compact)
+        # Keep the call history from weighing in
+        cache.history_maxlen = 1
+        before = client.info("memory")["used_memory"]
+        cache.store_many(f"{i:0{size}d}" for i in range(count))
+        after = client.info("memory")["used_memory"]
+        results[name] = (after - before) / count
+        cache.reset()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """
+    Find the cases whose throughput fell below the baseline.
+
+    Args:
+        results: The results of this run.
+        baseline: The saved results to compare against.
+        tolerance: The fraction of baseline ops/s a case may lose.
+
+    Returns:
+        List[str]: The names of the regressed cases.
+    """
+    return [name for name, result in results.items()
+            if name in baseline
+            and result["ops"] < baseline[name]["ops"] * (1 - tolerance)]
+
+
+def report(results: Dict[str, Dict[str, float]],
+           baseline: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    """
+    Print the results, with the change against the baseline if given.
+
+    Args:
+        results: The results of this run.
+        baseline: The saved results to compare against.
+    """
+    print(f"{'case':<26}{'ops/s':>12}{'p50 us':>10}{'p99 us':>10}"
+          + ("   vs baseline" if baseline else ""))
+    for name, result in results.items():
+        line = (f"{name:<26}{result['ops']:>12.0f}"
+                f"{result['p50']:>10.1f}{result['p99']:>10.1f}")
+        if baseline and name in baseline:
+            change = result["ops"] / baseline[name]["ops"] - 1
+            line += f"   {change:+.1%}"
+        print(line)
+
+
+def main() -> int:
+    """Run the suite from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000,
+                        help="timed calls per case (default: 2000)")
+    parser.add_argument("--history", type=int, default=10000,
+                        help="calls in the replayed history (default: 10000)")
+    parser.add_argument("--memory", type=int, default=0, metavar="COUNT",
+                        help="also compare bytes per value of the storage "
+                             "layouts over COUNT small values")
+    parser.add_argument("--save", metavar="FILE",
+                        help="write the results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed ops/s loss before a case counts as a "
+                             "regression (default: 0.2)")
+    args = parser.parse_args()
+
+    try:
+        redis.Redis().ping()
+    except redis.ConnectionError:
+        print("redis-server is not running on localhost:6379",
+              file=sys.stderr)
+        return 2
+
+    results = run(args.number, args.history)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    if args.memory:
+        memory = measure_memory(args.memory)
+        print(f"\n{'layout':<26}{'bytes/value':>12}")
+        for name, used in memory.items():
+            print(f"{name:<26}{used:>12.1f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if baseline:
+        regressed = compare(results, baseline, args.tolerance)
+        if regressed:
+            print(f"\nRegressed beyond {args.tolerance:.0%}: "
+                  + ", ".join(regressed))
+            return 1
+        print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Benchmark of TaggedSerializer against the raw bytes + fn conversion path
+"""
+import timeit
+from serializer import RawSerializer, TaggedSerializer
+
+NUMBER = 200000
+
+raw = RawSerializer()
+tagged = TaggedSerializer()
+
+CASES = [
+    ("int", 123456, lambda d: int(d), str(123456).encode()),
+    ("float", 3.14159, lambda d: float(d), str(3.14159).encode()),
+    ("str", "hello redis", lambda d: d.decode("utf-8"), b"hello redis"),
+    ("bytes", b"\x00" * 64, None, b"\x00" * 64),
+]
+
+
+def per_op(statement) -> float:
+    """Time a callable and return microseconds per call"""
+    return timeit.timeit(statement, number=NUMBER) / NUMBER * 1e6
+
+
+if __name__ == "__main__":
+    print(f"{'type':<8}{'raw get':>12}{'tagged dumps':>15}"
+          f"{'tagged loads':>15}  (us/op)")
+    for name, value, fn, stored in CASES:
+        if fn is None:
+            raw_cost = per_op(lambda: raw.loads(stored))
+        else:
+            raw_cost = per_op(lambda: fn(raw.loads(stored)))
+        encoded = tagged.dumps(value)
+        dumps_cost = per_op(lambda: tagged.dumps(value))
+        loads_cost = per_op(lambda: tagged.loads(encoded))
+        print(f"{name:<8}{raw_cost:>12.3f}{dumps_cost:>15.3f}"
+              f"{loads_cost:>15.3f}")
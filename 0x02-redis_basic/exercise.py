@@ -8,20 +8,492 @@ for storing and retrieving data with random keys.
 
 import redis
 import uuid
+import hashlib
 import functools
-from typing import Union, Callable, Optional, Any
+import itertools
+import random
+import re
+import inspect
+import threading
+import contextlib
+import time
+import latency
+from near_cache import NearCache
+from serializer import RawSerializer
+from typing import (
+    Union, Callable, Optional, Any, Iterable, Iterator, List, Tuple, IO, Dict,
+    AsyncIterator
+)
 
 
-def call_history(method: Callable) -> Callable:
+# Connection pools shared by every Cache created from the same URL
+_pools: Dict[str, redis.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _shared_pool(url: str) -> redis.ConnectionPool:
+    """
+    Get the process-wide connection pool for a Redis URL.
+
+    Args:
+        url: A redis://, rediss:// or unix:// URL.
+
+    Returns:
+        redis.ConnectionPool: The pool, created on first use.
+    """
+    with _pools_lock:
+        pool = _pools.get(url)
+        if pool is None:
+            pool = redis.ConnectionPool.from_url(url)
+            _pools[url] = pool
+        return pool
+
+
+# Takes one reference to each content-addressed value (KEYS[3:]) and
+# writes it (ARGV) unless it already exists, so a reference never
+# outlives its value
+_ACQUIRE_CONTENT = """
+for i = 3, #KEYS do
+    redis.call("SET", KEYS[i], ARGV[i - 2], "NX")
+    redis.call("HINCRBY", KEYS[1], KEYS[i], 1)
+end
+redis.call("HINCRBY", KEYS[2], "stored", #KEYS - 2)
+return 1
+"""
+
+# Drops one reference to a content-addressed value, deleting it at zero
+_RELEASE_CONTENT = """
+local refs = redis.call("HGET", KEYS[2], KEYS[1])
+if not refs then
+    return 0
+end
+redis.call("HINCRBY", KEYS[3], "stored", -1)
+if tonumber(refs) <= 1 then
+    redis.call("HDEL", KEYS[2], KEYS[1])
+    redis.call("DEL", KEYS[1])
+else
+    redis.call("HINCRBY", KEYS[2], KEYS[1], -1)
+end
+return 1
+"""
+
+
+# Header of the manifest stored in place of a value split into chunks
+_CHUNKED = b"\x00\x00chunks\x00"
+
+# How many chunks are written or read per round trip
+_CHUNK_WINDOW = 4
+
+
+# Marks the keys of values packed into hash buckets
+_COMPACT = "@"
+
+# The ids of compact mode reserved by this process but not handed out yet,
+# as [next, end] by connection pool, counter key and bucket size, so that
+# short-lived Cache instances keep filling the same buckets
+_id_ranges: Dict[Tuple[int, str, int], List[int]] = {}
+_id_ranges_lock = threading.Lock()
+
+# The hex id following _COMPACT in those keys, as store formats it
+_COMPACT_ID = re.compile(r"(?:0|[1-9a-f][0-9a-f]*)\Z")
+
+
+def _pack_int(number: int) -> bytes:
+    """
+    Encode a non-negative integer in as few big-endian bytes as possible.
+
+    Args:
+        number: The integer to encode.
+
+    Returns:
+        bytes: At least one byte.
+    """
+    return number.to_bytes(max((number.bit_length() + 7) // 8, 1), "big")
+
+
+def _is_buffer_source(data: Any) -> bool:
+    """
+    Tell whether a value to store is a buffer or a file-like object.
+
+    Args:
+        data: The value passed to store.
+
+    Returns:
+        bool: True for memoryview, bytearray and objects with a read
+        method.
+    """
+    return isinstance(data, (memoryview, bytearray)) or hasattr(data, "read")
+
+
+def _iter_source(data: Any, size: int) -> Iterator[Union[bytes, memoryview]]:
+    """
+    Split a value into chunks without copying buffers.
+
+    Args:
+        data: A bytes-like object or a binary file-like object.
+        size: The chunk size in bytes.
+
+    Returns:
+        Iterator[Union[bytes, memoryview]]: The chunks, in order; slices
+        of a buffer are views into it.
+    """
+    if hasattr(data, "read"):
+        while True:
+            block = data.read(size)
+            if not block:
+                return
+            yield block
+    view = memoryview(data).cast("B")
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+
+# Evicts the oldest entries of a memory budget index until it fits
+_EVICT = """
+local total = tonumber(redis.call("GET", KEYS[3]) or "0")
+local evicted = 0
+while total > tonumber(ARGV[1]) do
+    local oldest = redis.call("ZPOPMIN", KEYS[1])
+    if #oldest == 0 then
+        break
+    end
+    local key = oldest[1]
+    local entry = redis.call("HGET", KEYS[2], key)
+    redis.call("HDEL", KEYS[2], key)
+    redis.call("UNLINK", key)
+    local size, chunks = 0, 0
+    if entry then
+        local s, c = string.match(entry, "(%d+):(%d+)")
+        size, chunks = tonumber(s), tonumber(c)
+    end
+    for i = 0, chunks - 1 do
+        redis.call("UNLINK", key .. ":chunk:" .. i)
+    end
+    total = redis.call("DECRBY", KEYS[3], size)
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+# Removes one key from a memory budget index
+_UNTRACK = """
+local entry = redis.call("HGET", KEYS[2], ARGV[1])
+if not entry then
+    return 0
+end
+redis.call("HDEL", KEYS[2], ARGV[1])
+redis.call("ZREM", KEYS[1], ARGV[1])
+redis.call("DECRBY", KEYS[3], tonumber(string.match(entry, "(%d+):")))
+return 1
+"""
+
+
+def _to_str(data: Any) -> str:
+    """
+    Convert a value read back from Redis to a string.
+
+    Args:
+        data: Raw bytes, or any value already decoded by a serializer.
+
+    Returns:
+        str: The bytes decoded as UTF-8, or the value's str().
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return data.decode("utf-8")
+    return str(data)
+
+
+def _escape_pattern(text: str) -> str:
+    """
+    Escape the glob-style special characters of a SCAN MATCH pattern.
+
+    Args:
+        text: The literal text to match.
+
+    Returns:
+        str: The text with ``*``, ``?``, ``[``, ``]`` and ``\\`` escaped.
+    """
+    return "".join("\\" + char if char in "*?[]\\" else char
+                   for char in text)
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """
+    Split an iterable into lists of at most ``size`` items.
+
+    Args:
+        iterable: The items to split.
+        size: The maximum number of items per chunk.
+
+    Returns:
+        Iterator[List]: The consecutive chunks, without the empty tail.
+    """
+    if size < 1:
+        raise ValueError("chunk size must be a positive integer")
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextlib.contextmanager
+def _batched(instance: Any) -> Iterator[Any]:
+    """
+    Share one MULTI/EXEC pipeline between the decorators of a call.
+
+    The outermost caller opens the pipeline and executes it once the
+    wrapped method returns, so the counter, the history lists and the
+    method's own writes reach Redis in a single atomic round trip. Nested
+    callers reuse the open pipeline. If the method raises, the buffered
+    writes are discarded.
+
+    Args:
+        instance: The Cache instance whose connection is used.
+
+    Returns:
+        Iterator[Any]: A context manager yielding the shared pipeline.
+    """
+    pipe = getattr(instance._local, "pipe", None)
+    if pipe is not None:
+        yield pipe
+        return
+    pipe = instance._redis.pipeline()
+    instance._local.pipe = pipe
+    try:
+        yield pipe
+        pipe.execute()
+    finally:
+        instance._local.pipe = None
+        pipe.reset()
+
+
+@contextlib.asynccontextmanager
+async def _abatched(instance: Any) -> AsyncIterator[Any]:
+    """
+    Share one MULTI/EXEC pipeline between the decorators of a coroutine.
+
+    The asyncio counterpart of _batched. The open pipeline is tracked in a
+    context variable, so concurrent tasks on one event loop each get their
+    own transaction.
+
+    Args:
+        instance: The AsyncCache instance whose connection is used.
+
+    Returns:
+        AsyncIterator[Any]: An async context manager yielding the shared
+        pipeline.
+    """
+    pipe = instance._pipe.get()
+    if pipe is not None:
+        yield pipe
+        return
+    pipe = instance._redis.pipeline()
+    token = instance._pipe.set(pipe)
+    try:
+        yield pipe
+        await pipe.execute()
+    finally:
+        instance._pipe.reset(token)
+        await pipe.reset()
+
+
+def _record_calls(client: Any, qualname: str, amount: int = 1) -> None:
+    """
+    Queue the call counter increment used by count_calls.
+
+    Args:
+        client: The Redis client or pipeline to write through.
+        qualname: The qualified name of the counted method.
+        amount: How many calls to add to the counter.
+    """
+    client.incrby(qualname, amount)
+
+
+def _format_args(args: Tuple) -> str:
+    """
+    Render call arguments for the call history.
+
+    Binary arguments longer than 1 KiB are summarized by their size, so
+    storing a large value does not also build and store its repr.
+
+    Args:
+        args: The positional arguments of the call.
+
+    Returns:
+        str: The same text as ``str(args)`` for small arguments.
+    """
+    if not any(isinstance(arg, (bytes, bytearray)) and len(arg) > 1024
+               for arg in args):
+        return str(args)
+    parts = [f"<{len(arg)} bytes>"
+             if isinstance(arg, (bytes, bytearray)) and len(arg) > 1024
+             else repr(arg) for arg in args]
+    return "(" + ", ".join(parts) + ("," if len(parts) == 1 else "") + ")"
+
+
+def _record_history(client: Any, qualname: str,
+                    inputs: List[str], outputs: List[Any],
+                    maxlen: Optional[int] = None, stream: bool = False,
+                    client_times: Optional[List[float]] = None) -> None:
+    """
+    Queue the history writes used by call_history.
+
+    By default the inputs and outputs are appended to two lists. With
+    ``stream`` each call is one entry of the ``{qualname}:calls`` stream
+    holding its args, output, wall-clock timestamp and, when known, its
+    client time: the time spent in the method itself, which excludes the
+    Redis round trip that runs its writes along with the entry (use
+    track_latency for the full latency).
+
+    Args:
+        client: The Redis client or pipeline to write through.
+        qualname: The qualified name of the recorded method.
+        inputs: The stringified argument tuples, one per call.
+        outputs: The return values, one per call.
+        maxlen: If set, trim both lists to their last ``maxlen`` entries,
+            or the stream to about ``maxlen`` entries.
+        stream: Whether to write stream entries instead of lists.
+        client_times: The client-side time in seconds of each call, if
+            known.
+    """
+    if stream:
+        now = f"{time.time():.6f}"
+        for i, (inp, out) in enumerate(zip(inputs, outputs)):
+            fields = {"args": inp, "output": out, "ts": now}
+            if client_times is not None:
+                fields["client_time"] = f"{client_times[i]:.9f}"
+            client.xadd(f"{qualname}:calls", fields,
+                        maxlen=maxlen, approximate=True)
+        return
+    for key, values in ((f"{qualname}:inputs", inputs),
+                        (f"{qualname}:outputs", outputs)):
+        if not values:
+            continue
+        client.rpush(key, *values)
+        if maxlen is not None:
+            client.ltrim(key, -maxlen, -1)
+
+
+def _history_stream(instance: Any, stream: Optional[bool] = None) -> bool:
+    """
+    Resolve whether an instance records its call history in a stream.
+
+    Args:
+        instance: The Cache instance whose method is recorded.
+        stream: The choice given to the decorator, if any.
+
+    Returns:
+        bool: True for the stream backend, False for the two lists.
+    """
+    if stream is None:
+        stream = getattr(instance, "history_stream", False)
+    return stream
+
+
+def _history_limits(instance: Any, maxlen: Optional[int],
+                    sample: Optional[int]) -> Tuple[Optional[int], int]:
+    """
+    Resolve the history length cap and sampling rate for an instance.
+
+    Values given to the decorator win over the ``history_maxlen`` and
+    ``history_sample`` attributes of the instance.
+
+    Args:
+        instance: The Cache instance whose method is recorded.
+        maxlen: The cap given to the decorator, if any.
+        sample: The sampling rate given to the decorator, if any.
+
+    Returns:
+        Tuple[Optional[int], int]: The length cap (None for unbounded) and
+        the sampling rate (1 records every call).
+    """
+    if maxlen is None:
+        maxlen = getattr(instance, "history_maxlen", None)
+    if sample is None:
+        sample = getattr(instance, "history_sample", 1)
+    return maxlen, sample
+
+
+def _sampled(sample: int) -> bool:
+    """
+    Decide whether a call is recorded under a 1-in-``sample`` rate.
+
+    Args:
+        sample: The sampling rate, 1 meaning every call.
+
+    Returns:
+        bool: True if the call should be recorded.
+    """
+    return sample <= 1 or random.randrange(sample) == 0
+
+
+def call_history(method: Optional[Callable] = None, *,
+                 maxlen: Optional[int] = None,
+                 sample: Optional[int] = None,
+                 stream: Optional[bool] = None) -> Callable:
     """
     Decorator that stores the history of inputs and outputs for a function.
 
+    The list appends share one transaction with the wrapped method's own
+    writes, so the inputs and outputs lists always stay aligned. Both lists
+    can be capped to their last ``maxlen`` entries (trimmed in the same
+    transaction) and recorded for only 1 in ``sample`` calls; count_calls
+    keeps the exact call count either way.
+
+    With ``stream`` the history is one stream entry per call instead,
+    with its timestamp and client time (the time spent in the method,
+    before its buffered writes reach Redis), capped to about ``maxlen``
+    entries;
+    read it back by time with iter_calls or tail it with read_calls.
+
+    Can be used bare (``@call_history``) or with options
+    (``@call_history(maxlen=1000, sample=10)``). Options left unset fall
+    back to the instance's ``history_maxlen``, ``history_sample`` and
+    ``history_stream``.
+    Coroutine methods get a coroutine wrapper that awaits the transaction.
+
     Args:
         method: The method to be decorated.
+        maxlen: The maximum number of calls kept in the history.
+        sample: Record one in every ``sample`` calls.
+        stream: Whether to record the history in a stream.
 
     Returns:
         Callable: The wrapped method that stores call history in Redis.
     """
+    if method is None:
+        return functools.partial(call_history, maxlen=maxlen, sample=sample,
+                                 stream=stream)
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            """
+            Coroutine wrapper that stores input and output history.
+
+            Args:
+                self: The instance of the AsyncCache class.
+                *args: Positional arguments for the method.
+                **kwargs: Keyword arguments for the method.
+
+            Returns:
+                The return value of the original coroutine.
+            """
+            limit, rate = _history_limits(self, maxlen, sample)
+            async with _abatched(self) as pipe:
+                start = time.perf_counter()
+                output = await method(self, *args, **kwargs)
+                if _sampled(rate):
+                    _record_history(pipe, self._key(method.__qualname__),
+                                    [_format_args(args)], [output], limit,
+                                    _history_stream(self, stream),
+                                    [time.perf_counter() - start])
+            return output
+
+        return async_wrapper
+
     @functools.wraps(method)
     def wrapper(self, *args, **kwargs):
         """
@@ -35,17 +507,18 @@ def call_history(method: Callable) -> Callable:
         Returns:
             The return value of the original method.
         """
-        input_key = f"{method.__qualname__}:inputs"
-        output_key = f"{method.__qualname__}:outputs"
-
-        # Store input arguments
-        self._redis.rpush(input_key, str(args))
-
-        # Execute the original method
-        output = method(self, *args, **kwargs)
+        limit, rate = _history_limits(self, maxlen, sample)
+        with _batched(self) as pipe:
+            # Execute the original method, buffering its writes
+            start = time.perf_counter()
+            output = method(self, *args, **kwargs)
 
-        # Store output
-        self._redis.rpush(output_key, output)
+            # Store input arguments and output in the same transaction
+            if _sampled(rate):
+                _record_history(pipe, self._key(method.__qualname__),
+                                [_format_args(args)], [output], limit,
+                                _history_stream(self, stream),
+                                [time.perf_counter() - start])
 
         return output
 
@@ -56,12 +529,35 @@ def count_calls(method: Callable) -> Callable:
     """
     Decorator that counts how many times a method is called.
 
+    The increment is buffered into the same transaction as the wrapped
+    method's writes instead of costing its own round trip. Coroutine
+    methods get a coroutine wrapper that awaits the transaction.
+
     Args:
         method: The method to be decorated.
 
     Returns:
         Callable: The wrapped method that increments a counter in Redis.
     """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            """
+            Coroutine wrapper that increments the method call count.
+
+            Args:
+                self: The instance of the AsyncCache class.
+                *args: Positional arguments for the method.
+                **kwargs: Keyword arguments for the method.
+
+            Returns:
+                The return value of the original coroutine.
+            """
+            async with _abatched(self) as pipe:
+                _record_calls(pipe, self._key(method.__qualname__))
+                return await method(self, *args, **kwargs)
+
+        return async_wrapper
 
     @functools.wraps(method)
     def wrapper(self, *args, **kwargs):
@@ -76,9 +572,55 @@ def count_calls(method: Callable) -> Callable:
         Returns:
             The return value of the original method.
         """
-        key = method.__qualname__
-        self._redis.incr(key)
-        return method(self, *args, **kwargs)
+        with _batched(self) as pipe:
+            _record_calls(pipe, self._key(method.__qualname__))
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def track_latency(method: Callable) -> Callable:
+    """
+    Decorator that records how long a method takes.
+
+    Durations are counted in process into log-scaled histogram buckets,
+    costing a clock read and a dict increment per call, and merged into
+    the ``{qualname}:latency`` hash about once a second, so the histograms
+    of every worker add up. Read them back with latency_stats.
+
+    Tracking is opt-in: calls are only timed while the instance's
+    ``latency_tracking`` attribute is set, and otherwise cost one
+    attribute check.
+
+    Args:
+        method: The method to be decorated.
+
+    Returns:
+        Callable: The wrapped method that records its latency.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        """
+        Wrapper function that times the method call.
+
+        Args:
+            self: The instance of the Cache class.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+
+        Returns:
+            The return value of the original method.
+        """
+        if not self.latency_tracking:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter_ns()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            latency.recorder.record(
+                self._redis, self._key(f"{method.__qualname__}:latency"),
+                time.perf_counter_ns() - start
+            )
 
     return wrapper
 
@@ -89,34 +631,626 @@ class Cache:
 
     This class provides methods to store data in Redis using random keys
     and retrieve the data later.
+
+    Attributes:
+        default_url: The Redis URL used when no connection is given.
+        history_maxlen: The maximum number of calls kept by call_history,
+            or None to keep them all.
+        history_sample: Record one in every ``history_sample`` calls.
+        history_stream: Whether call_history writes one stream entry per
+            call instead of the inputs and outputs lists.
+        chunk_size: Values larger than this many bytes are split into
+            chunks.
+        default_ttl: The expiry in seconds of stored values, or None to
+            keep them until deleted.
+        memory_budget: If set, the number of value bytes kept by this
+            instance's namespace; older values are evicted past it.
+        eviction: Which values go first over the budget: "lru" (least
+            recently read) or "oldest" (first stored).
+        compact_bucket_size: How many values compact mode packs into
+            one hash; keep it within the server's hash-max-listpack-entries
+            so buckets keep their compact encoding.
+        compact_max_value: The largest encoded value, in bytes, packed
+            in compact mode; keep it within hash-max-listpack-value.
+        latency_tracking: Whether methods decorated with track_latency
+            (store and get) record their latency.
     """
 
-    def __init__(self) -> None:
+    default_url: str = "redis://localhost:6379/0"
+    history_maxlen: Optional[int] = None
+    history_sample: int = 1
+    history_stream: bool = False
+    chunk_size: int = 1 << 20
+    default_ttl: Optional[int] = None
+    memory_budget: Optional[int] = None
+    eviction: str = "lru"
+    compact_bucket_size: int = 128
+    compact_max_value: int = 64
+    latency_tracking: bool = False
+
+    def __init__(self, client: Optional[redis.Redis] = None,
+                 url: Optional[str] = None,
+                 pool: Optional[redis.ConnectionPool] = None,
+                 namespace: str = "", flush: bool = False,
+                 serializer: Optional[Any] = None,
+                 dedup: bool = False, compact: bool = False) -> None:
         """
         Initialize the Cache instance.
 
-        Creates a Redis client instance and flushes the database to start
-        with a clean state.
+        Connects through an existing client, an explicit pool, or the
+        process-wide pool for ``url`` (``default_url`` if none is given),
+        so creating a Cache does not open new connections. Every key this
+        instance writes, including the call counters and histories, is
+        prefixed with ``namespace``.
+
+        Args:
+            client: An existing Redis client to use as is.
+            url: A redis:// or unix:// URL whose shared pool is used.
+            pool: A connection pool to build the client on.
+            namespace: The prefix for every key written by this instance.
+            flush: Whether to flush the whole database first (blocking,
+                and it wipes data of every other user of the database).
+            serializer: How values are encoded, such as TaggedSerializer
+                to get values back with their type (default: raw bytes).
+            dedup: Whether to key values by a hash of their content, so
+                identical values are stored once and reference counted.
+            compact: Whether to pack small values without an expiry into
+                hashes of ``compact_bucket_size`` fields, addressed by a
+                short sequential id instead of a key of their own.
+        """
+        if client is None:
+            if pool is None:
+                pool = _shared_pool(url or self.default_url)
+            client = redis.Redis(connection_pool=pool)
+        self._redis = client
+        self._namespace = namespace
+        self._local = threading.local()
+        self._near: Optional[NearCache] = None
+        self._serializer = serializer or RawSerializer()
+        self._dedup = dedup
+        self._acquire_content = self._redis.register_script(_ACQUIRE_CONTENT)
+        self._release_content = self._redis.register_script(_RELEASE_CONTENT)
+        if self.eviction not in ("lru", "oldest"):
+            raise ValueError("eviction must be 'lru' or 'oldest'")
+        if dedup and self.memory_budget is not None:
+            raise ValueError("dedup mode does not support a memory budget")
+        if compact and (dedup or self.memory_budget is not None):
+            raise ValueError("compact mode does not support dedup or a "
+                             "memory budget")
+        if not 0 < self.compact_bucket_size <= 1 << 16:
+            raise ValueError("compact_bucket_size must be between 1 and "
+                             "65536")
+        self._compact = compact
+        self._compact_prefix = self._key(_COMPACT)
+        self._evict = self._redis.register_script(_EVICT)
+        self._untrack = self._redis.register_script(_UNTRACK)
+        if flush:
+            self._redis.flushdb()
+
+    def _key(self, name: str) -> str:
+        """
+        Prefix a key name with the namespace of this instance.
+
+        Args:
+            name: The unprefixed key name.
+
+        Returns:
+            str: The key name as stored in Redis.
+        """
+        return f"{self._namespace}{name}"
+
+    def _new_entries(self, items: List[Any],
+                     ttl: Optional[int] = None) -> Tuple[List[str],
+                                                         Dict[str, Any]]:
+        """
+        Choose the keys for new values and the writes they need.
+
+        Without dedup every value gets a random key, unless compact mode
+        packs it into a bucket. With dedup the key is a hash of the encoded
+        value, and one script call takes a reference to every key and
+        writes the values that are missing, so nothing is left to write.
+
+        Args:
+            items: The values about to be stored.
+            ttl: The expiry of the values; values that expire are never
+                packed, since hash fields cannot expire on their own.
+
+        Returns:
+            Tuple[List[str], Dict[str, Any]]: One key per value, and the
+            values to write by key.
+        """
+        if self._compact and ttl is None:
+            return self._compact_entries(items)
+        if not self._dedup:
+            keys = [self._key(str(uuid.uuid4())) for _ in items]
+            return keys, {key: self._serializer.dumps(item)
+                          for key, item in zip(keys, items)}
+
+        encoder = self._redis.get_encoder()
+        payloads = [encoder.encode(self._serializer.dumps(item))
+                    for item in items]
+        keys = [self._key("cas:" + hashlib.blake2b(
+            payload, digest_size=16).hexdigest()) for payload in payloads]
+        self._acquire_content(
+            keys=[self._key("cas:refs"), self._key("cas:stats"), *keys],
+            args=payloads
+        )
+        return keys, {}
+
+    def _compact_entries(self, items: List[Any]) -> Tuple[List[str],
+                                                          Dict[str, Any]]:
+        """
+        Give the values small enough to be packed a compact key.
+
+        Args:
+            items: The values about to be stored.
+
+        Returns:
+            Tuple[List[str], Dict[str, Any]]: One key per value (a random
+            one for values over ``compact_max_value`` bytes), and the
+            encoded values to write by key.
+        """
+        encoder = self._redis.get_encoder()
+        payloads = [encoder.encode(self._serializer.dumps(item))
+                    for item in items]
+        ids = iter(self._reserve_ids(sum(
+            len(payload) <= self.compact_max_value for payload in payloads
+        )))
+        keys = [f"{self._compact_prefix}{next(ids):x}"
+                if len(payload) <= self.compact_max_value
+                else self._key(str(uuid.uuid4()))
+                for payload in payloads]
+        return keys, dict(zip(keys, payloads))
+
+    def _reserve_ids(self, count: int) -> List[int]:
+        """
+        Take the next ``count`` ids of compact mode.
+
+        Ids are reserved from the namespace's counter a whole bucket at a
+        time and shared by every instance of the process on the same
+        connection pool and namespace, so a store rarely costs an extra
+        round trip and each process fills buckets of its own, however
+        many instances it creates.
+
+        Args:
+            count: The number of ids needed.
+
+        Returns:
+            List[int]: Ids never handed out before.
+        """
+        size = self.compact_bucket_size
+        counter = self._key("compact:next")
+        ids: List[int] = []
+        with _id_ranges_lock:
+            reserved = _id_ranges.setdefault(
+                (id(self._redis.connection_pool), counter, size), [0, 0]
+            )
+            while len(ids) < count:
+                if reserved[0] == reserved[1]:
+                    blocks = -(-(count - len(ids)) // size)
+                    reserved[1] = self._redis.incrby(counter, blocks * size)
+                    reserved[0] = reserved[1] - blocks * size
+                taken = min(count - len(ids), reserved[1] - reserved[0])
+                ids.extend(range(reserved[0], reserved[0] + taken))
+                reserved[0] += taken
+        return ids
+
+    def _is_compact(self, key: str) -> bool:
+        """
+        Tell whether a key was returned by store in compact mode.
+
+        Only instances in compact mode route keys to buckets, so regular
+        keys starting with "@" stay readable by every other instance.
+
+        Args:
+            key: The key to check.
+
+        Returns:
+            bool: True for the namespace, "@" and a hex id.
+        """
+        return (self._compact and key.startswith(self._compact_prefix)
+                and _COMPACT_ID.match(key, len(self._compact_prefix))
+                is not None)
+
+    def _locate(self, key: str) -> Tuple[bytes, bytes]:
+        """
+        Find where compact mode keeps a value.
+
+        Args:
+            key: A key returned by store in compact mode.
+
+        Returns:
+            Tuple[bytes, bytes]: The binary name of the bucket hash and the
+            binary field holding the value.
+        """
+        number = int(key[len(self._compact_prefix):], 16)
+        bucket, offset = divmod(number, self.compact_bucket_size)
+        return (self._compact_prefix.encode("utf-8") + _pack_int(bucket),
+                _pack_int(offset))
+
+    def _queue_writes(self, pipe: Any, writes: Dict[str, Any],
+                      ttl: Optional[int]) -> None:
+        """
+        Queue the writes of new values, packed values grouped per bucket.
+
+        Args:
+            pipe: The pipeline the values are written through.
+            writes: The values to write by key.
+            ttl: The expiry of the unpacked values in seconds, if any.
+        """
+        buckets: Dict[bytes, Dict[bytes, Any]] = {}
+        plain: Dict[str, Any] = {}
+        for key, payload in writes.items():
+            if self._is_compact(key):
+                bucket, field = self._locate(key)
+                buckets.setdefault(bucket, {})[field] = payload
+            else:
+                plain[key] = payload
+        for bucket, fields in buckets.items():
+            pipe.hset(bucket, mapping=fields)
+        if ttl is not None or len(plain) == 1:
+            for key, payload in plain.items():
+                pipe.set(key, payload, ex=ttl)
+        elif plain:
+            pipe.mset(plain)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        """
+        Read the stored bytes of a key, packed or not.
+
+        Args:
+            key: The key returned by store.
+
+        Returns:
+            Optional[bytes]: The stored bytes, or None if key doesn't exist.
+        """
+        if self._is_compact(key):
+            return self._redis.hget(*self._locate(key))
+        return self._redis.get(key)
+
+    def _budget_keys(self) -> List[str]:
+        """
+        Get the keys of the memory budget bookkeeping.
+
+        Returns:
+            List[str]: The index sorted set (scored by store or last read
+            time), the hash of value sizes and the byte counter.
+        """
+        return [self._key("budget:index"), self._key("budget:sizes"),
+                self._key("budget:bytes")]
+
+    def _track(self, pipe: Any, sizes: Dict[str, Tuple[int, int]]) -> None:
+        """
+        Queue the budget bookkeeping of newly stored values.
+
+        Does nothing without a memory budget. Values expired by their TTL
+        stay counted until they are evicted, which only removes their
+        index entry.
+
+        Args:
+            pipe: The pipeline the values are written through.
+            sizes: The byte size and chunk count of each new key.
+        """
+        if self.memory_budget is None or not sizes:
+            return
+        index, size_key, total = self._budget_keys()
+        now = time.time()
+        pipe.zadd(index, {key: now for key in sizes})
+        pipe.hset(size_key, mapping={
+            key: f"{size}:{chunks}" for key, (size, chunks) in sizes.items()
+        })
+        pipe.incrby(total, sum(size for size, _ in sizes.values()))
+        self._evict(keys=[index, size_key, total],
+                    args=[self.memory_budget], client=pipe)
+
+    def _resolve_ttl(self, ttl: Optional[int]) -> Optional[int]:
+        """
+        Resolve the expiry of a store, falling back to ``default_ttl``.
+
+        Args:
+            ttl: The expiry given to the call, if any.
+
+        Returns:
+            Optional[int]: The expiry in seconds, or None for no expiry.
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        if ttl is not None and self._dedup:
+            raise ValueError("dedup mode does not support a ttl")
+        return ttl
+
+    def _sizes(self, writes: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+        """
+        Measure values about to be written, when a budget is set.
+
+        Args:
+            writes: The values to write by key.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: The encoded size and a chunk count
+            of 0 for each key, or nothing without a memory budget.
+        """
+        if self.memory_budget is None:
+            return {}
+        encoder = self._redis.get_encoder()
+        return {key: (len(encoder.encode(payload)), 0)
+                for key, payload in writes.items()}
+
+    def memory_usage(self) -> Dict[str, Optional[int]]:
+        """
+        Get the bytes tracked against the memory budget.
+
+        Returns:
+            Dict[str, Optional[int]]: The tracked ``bytes`` and ``keys``,
+            and the ``budget`` (None when there is none).
+        """
+        index, _, total = self._budget_keys()
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.get(total)
+        pipe.zcard(index)
+        used, keys = pipe.execute()
+        return {"bytes": int(used or 0), "keys": keys,
+                "budget": self.memory_budget}
+
+    def _store_chunks(self, key: str, data: Any,
+                      ttl: Optional[int] = None) -> bytes:
+        """
+        Write a value as chunks and build the manifest that replaces it.
+
+        Chunks are sent ``_CHUNK_WINDOW`` at a time, so at most that many
+        chunks of a file-like source are held in memory, and slices of a
+        buffer are sent without being copied.
+
+        Args:
+            key: The key the manifest will be stored at.
+            data: A bytes-like object or a binary file-like object.
+            ttl: The expiry of the manifest in seconds, if any.
+
+        Returns:
+            bytes: The manifest, recording the total size and chunk count.
+        """
+        size = count = 0
+        # Chunks outlive their manifest so a reader never misses one
+        expiry = None if ttl is None else ttl + 1
+        pipe = self._redis.pipeline(transaction=False)
+        for chunk in _iter_source(data, self.chunk_size):
+            pipe.set(f"{key}:chunk:{count}", chunk, ex=expiry)
+            size += len(chunk)
+            count += 1
+            if count % _CHUNK_WINDOW == 0:
+                pipe.execute()
+        pipe.execute()
+        return _CHUNKED + b"%d:%d" % (size, count)
+
+    def _read_chunks(self, key: str,
+                     manifest: bytes) -> Iterator[bytes]:
+        """
+        Read the chunks of a value split by _store_chunks.
+
+        Args:
+            key: The key of the manifest.
+            manifest: The manifest stored at ``key``.
+
+        Returns:
+            Iterator[bytes]: The chunks, ``_CHUNK_WINDOW`` read per round
+            trip.
+        """
+        count = int(manifest[len(_CHUNKED):].split(b":")[1])
+        names = [f"{key}:chunk:{i}" for i in range(count)]
+        for window in _chunked(names, _CHUNK_WINDOW):
+            for name, chunk in zip(window, self._redis.mget(window)):
+                if chunk is None:
+                    raise ValueError(f"{name} is missing")
+                yield chunk
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        """
+        Stream a stored value chunk by chunk.
+
+        Args:
+            key: The key to retrieve data for.
+
+        Returns:
+            Iterator[bytes]: The chunks of a value split on store, or the
+            whole value as one chunk; nothing if the key doesn't exist.
+        """
+        data = self._read(key)
+        if data is None:
+            return
+        if data.startswith(_CHUNKED):
+            yield from self._read_chunks(key, data)
+        else:
+            yield data
+
+    def get_into(self, key: str, buffer: Any) -> Optional[int]:
+        """
+        Copy a stored value into a preallocated writable buffer.
+
+        Args:
+            key: The key to retrieve data for.
+            buffer: A writable bytes-like object, such as a bytearray.
+
+        Returns:
+            The number of bytes written, or None if key doesn't exist.
+        """
+        data = self._read(key)
+        if data is None:
+            return None
+        view = memoryview(buffer).cast("B")
+        if data.startswith(_CHUNKED):
+            size = int(data[len(_CHUNKED):].split(b":")[0])
+            chunks = self._read_chunks(key, data)
+        else:
+            size = len(data)
+            chunks = iter([data])
+        if size > len(view):
+            raise ValueError(f"{key} holds {size} bytes, "
+                             f"the buffer only {len(view)}")
+        offset = 0
+        for chunk in chunks:
+            view[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+        return offset
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete a stored value.
+
+        A content-addressed value is only removed from Redis once every
+        store of it has been deleted, and a value split into chunks is
+        removed with all of its chunks.
+
+        Args:
+            key: The key returned by store.
+
+        Returns:
+            bool: True if the key existed.
+        """
+        if self._is_compact(key):
+            return bool(self._redis.hdel(*self._locate(key)))
+        if not key.startswith(self._key("cas:")):
+            head = self._redis.getrange(key, 0, 63)
+            count = 0
+            if head.startswith(_CHUNKED):
+                count = int(head[len(_CHUNKED):].split(b":")[1])
+            pipe = self._redis.pipeline()
+            if self.memory_budget is not None:
+                self._untrack(keys=self._budget_keys(), args=[key],
+                              client=pipe)
+            pipe.unlink(key, *(f"{key}:chunk:{i}" for i in range(count)))
+            return bool(pipe.execute()[-1])
+        return bool(self._release_content(
+            keys=[key, self._key("cas:refs"), self._key("cas:stats")]
+        ))
+
+    def dedup_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Get the effect of content-addressed storage.
+
+        Returns:
+            Dict[str, Union[int, float]]: The number of live stores, the
+            number of distinct values actually kept, and their ratio.
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hget(self._key("cas:stats"), "stored")
+        pipe.hlen(self._key("cas:refs"))
+        stored, unique = pipe.execute()
+        stored = int(stored or 0)
+        return {
+            "stored": stored,
+            "unique": unique,
+            "dedup_ratio": stored / unique if unique else 1.0,
+        }
+
+    def enable_near_cache(self, maxsize: int = 1024,
+                          ttl: float = 60.0) -> NearCache:
+        """
+        Serve get, get_str and get_int through an in-process near cache.
+
+        Hot keys are then read from process memory; Redis keeps them
+        coherent by pushing invalidations through CLIENT TRACKING.
+
+        Args:
+            maxsize: The maximum number of values kept in process.
+            ttl: The maximum age in seconds of a value kept in process.
+
+        Returns:
+            NearCache: The near cache, whose stats() reports hits, misses
+            and invalidations.
+        """
+        self.disable_near_cache()
+        self._near = NearCache(self._redis.connection_pool, maxsize, ttl)
+        return self._near
+
+    def disable_near_cache(self) -> None:
+        """
+        Close the near cache, if any, and read from Redis again.
+        """
+        if self._near is not None:
+            self._near.close()
+            self._near = None
+
+    def reset(self, batch_size: int = 1000, flush: bool = False) -> int:
+        """
+        Delete every key in the namespace of this instance.
+
+        Keys are found with an incremental SCAN and removed with pipelined
+        UNLINKs, so the server is never blocked the way FLUSHDB blocks it.
+        An instance without a namespace shares the database with every
+        other user of it, so it only resets with ``flush``, which flushes
+        the whole database asynchronously.
+
+        Args:
+            batch_size: The SCAN page size and the number of keys per UNLINK.
+            flush: Whether an instance without a namespace may flush the
+                whole database.
+
+        Returns:
+            int: The number of keys deleted, or 0 after an asynchronous
+            flush.
+
+        Raises:
+            ValueError: If the instance has no namespace and ``flush`` is
+                not set.
         """
-        self._redis = redis.Redis()
-        self._redis.flushdb()
+        if not self._namespace:
+            if not flush:
+                raise ValueError("reset without a namespace would flush the "
+                                 "whole database; pass flush=True to do so")
+            self._redis.flushdb(asynchronous=True)
+            return 0
+        pattern = _escape_pattern(self._namespace) + "*"
+        keys = self._redis.scan_iter(match=pattern, count=batch_size)
+        deleted = 0
+        for chunk in _chunked(keys, batch_size):
+            deleted += self._redis.unlink(*chunk)
+        return deleted
 
+    @track_latency
     @call_history
     @count_calls
-    def store(self, data: Union[str, bytes, int, float]) -> str:
+    def store(self, data: Union[str, bytes, int, float],
+              ttl: Optional[int] = None) -> str:
         """
         Store data in Redis with a random key.
 
+        Bytes larger than ``chunk_size``, and any memoryview, bytearray or
+        binary file-like object, are stored as raw bytes: small buffers
+        with one SET of a view of them, larger ones as pipelined chunks
+        behind a manifest at the returned key.
+
         Args:
-            data: The data to store. Can be str, bytes, int, or float.
+            data: The data to store. Can be str, bytes, int, or float, or
+                any type the serializer of this instance supports.
+            ttl: The expiry in seconds (default: ``default_ttl``).
 
         Returns:
             str: The random key used to store the data.
         """
-        key = str(uuid.uuid4())
-        self._redis.set(key, data)
-        return key
+        ttl = self._resolve_ttl(ttl)
+        if _is_buffer_source(data) or (isinstance(data, bytes)
+                                       and len(data) > self.chunk_size):
+            key = self._key(str(uuid.uuid4()))
+            if not hasattr(data, "read") and len(
+                    memoryview(data).cast("B")) <= self.chunk_size:
+                payload = memoryview(data).cast("B")
+                sizes = {key: (len(payload), 0)}
+            else:
+                payload = self._store_chunks(key, data, ttl)
+                size, count = payload[len(_CHUNKED):].split(b":")
+                sizes = {key: (int(size), int(count))}
+            # The manifest is only written once every chunk is in place
+            with _batched(self) as pipe:
+                pipe.set(key, payload, ex=ttl)
+                self._track(pipe, sizes)
+            return key
+        keys, writes = self._new_entries([data], ttl)
+        with _batched(self) as pipe:
+            self._queue_writes(pipe, writes, ttl)
+            self._track(pipe, self._sizes(writes))
+        return keys[0]
 
+    @track_latency
     def get(self, key: str, fn: Optional[Callable] = None) -> Any:
         """
         Get data from Redis and optionally apply a conversion function.
@@ -129,9 +1263,24 @@ class Cache:
             The data from Redis, optionally converted, or None if key
             doesn't exist.
         """
-        data = self._redis.get(key)
+        if self._is_compact(key):
+            data = self._read(key)
+        elif self._near is not None:
+            data = self._near.get(key)
+        elif self.memory_budget is not None and self.eviction == "lru":
+            # Reads refresh the key's place in the eviction order
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.zadd(self._key("budget:index"), {key: time.time()}, xx=True)
+            data = pipe.execute()[0]
+        else:
+            data = self._redis.get(key)
         if data is None:
             return None
+        if data.startswith(_CHUNKED):
+            data = b"".join(self._read_chunks(key, data))
+        else:
+            data = self._serializer.loads(data)
         if fn is not None:
             return fn(data)
         return data
@@ -146,7 +1295,7 @@ class Cache:
         Returns:
             The data as a string, or None if key doesn't exist.
         """
-        return self.get(key, fn=lambda d: d.decode("utf-8"))
+        return self.get(key, fn=_to_str)
 
     def get_int(self, key: str) -> Optional[int]:
         """
@@ -160,36 +1309,411 @@ class Cache:
         """
         return self.get(key, fn=int)
 
+    def store_many(self, data: Iterable[Union[str, bytes, int, float]],
+                   chunk_size: int = 1000,
+                   ttl: Optional[int] = None) -> List[str]:
+        """
+        Store many values in Redis, one round trip per chunk.
+
+        Every chunk is written with a single MSET (or one SET per value
+        when they expire), together with the call counter and call
+        history updates that ``store`` would have made for each item, so
+        ``replay(cache.store)`` still lists them (subject to
+        ``history_maxlen`` and ``history_sample``).
+
+        Args:
+            data: The values to store. Each can be str, bytes, int, or float.
+            chunk_size: The maximum number of values sent per round trip.
+            ttl: The expiry in seconds (default: ``default_ttl``).
+
+        Returns:
+            List[str]: The random keys, in the same order as the values.
+        """
+        qualname = self._key(self.store.__qualname__)
+        limit, rate = _history_limits(self, None, None)
+        ttl = self._resolve_ttl(ttl)
+        keys: List[str] = []
+        for chunk in _chunked(data, chunk_size):
+            chunk_keys, writes = self._new_entries(chunk, ttl)
+            recorded = [(_format_args((item,)), key)
+                        for key, item in zip(chunk_keys, chunk)
+                        if _sampled(rate)]
+            pipe = self._redis.pipeline()
+            _record_calls(pipe, qualname, len(chunk))
+            self._queue_writes(pipe, writes, ttl)
+            self._track(pipe, self._sizes(writes))
+            _record_history(pipe, qualname,
+                            [inp for inp, _ in recorded],
+                            [out for _, out in recorded], limit,
+                            _history_stream(self))
+            pipe.execute()
+            keys.extend(chunk_keys)
+        return keys
+
+    def get_many(self, keys: Iterable[str], fn: Optional[Callable] = None,
+                 chunk_size: int = 1000) -> List[Any]:
+        """
+        Get many values from Redis in a single pipelined round trip.
+
+        Keys packed by compact mode are read with one HMGET per bucket,
+        in the same round trip.
+
+        Args:
+            keys: The keys to retrieve data for.
+            fn: Optional callable applied to every value that exists.
+            chunk_size: The maximum number of keys per MGET command.
+
+        Returns:
+            List[Any]: The values in the same order as the keys, with None
+            for keys that don't exist.
+        """
+        keys = list(keys)
+        plain: List[int] = []
+        buckets: Dict[bytes, List[Tuple[int, bytes]]] = {}
+        for i, key in enumerate(keys):
+            if self._is_compact(key):
+                bucket, field = self._locate(key)
+                buckets.setdefault(bucket, []).append((i, field))
+            else:
+                plain.append(i)
+        chunks = list(_chunked(plain, chunk_size))
+        pipe = self._redis.pipeline(transaction=False)
+        for chunk in chunks:
+            pipe.mget([keys[i] for i in chunk])
+        for bucket, fields in buckets.items():
+            pipe.hmget(bucket, [field for _, field in fields])
+        touch = (bool(plain) and self.memory_budget is not None
+                 and self.eviction == "lru")
+        if touch:
+            # Reads refresh the keys' place in the eviction order
+            now = time.time()
+            pipe.zadd(self._key("budget:index"),
+                      {keys[i]: now for i in plain}, xx=True)
+        replies = iter(pipe.execute())
+        found: List[Any] = [None] * len(keys)
+        for chunk in chunks:
+            for i, value in zip(chunk, next(replies)):
+                found[i] = value
+        for fields in buckets.values():
+            for (i, _), value in zip(fields, next(replies)):
+                found[i] = value
+        values = [
+            None if value is None
+            # Values split into chunks are fetched separately
+            else b"".join(self._read_chunks(key, value))
+            if value.startswith(_CHUNKED)
+            else self._serializer.loads(value)
+            for key, value in zip(keys, found)
+        ]
+        if fn is None:
+            return values
+        return [None if value is None else fn(value) for value in values]
+
+
+def latency_stats(method: Callable) -> Dict[str, float]:
+    """
+    Get the latency of a method across every worker.
+
+    Buckets still pending in this process are merged first.
+
+    Args:
+        method: The bound Cache method decorated with track_latency.
+
+    Returns:
+        Dict[str, float]: The call ``count``, and ``p50``, ``p95``,
+        ``p99`` and ``max`` in seconds.
+    """
+    latency.recorder.flush()
+    instance = method.__self__
+    return latency.summarize(instance._redis.hgetall(
+        instance._key(f"{method.__qualname__}:latency")
+    ))
+
+
+def _history_length(client: Any, base_key: str) -> int:
+    """
+    Get the number of complete input/output pairs in a call history.
+
+    Args:
+        client: The Redis client holding the history.
+        base_key: The namespaced qualified name of the recorded method.
+
+    Returns:
+        int: The length of the shorter of the two history lists.
+    """
+    pipe = client.pipeline(transaction=False)
+    pipe.llen(f"{base_key}:inputs")
+    pipe.llen(f"{base_key}:outputs")
+    return min(pipe.execute())
+
+
+def iter_history(method: Callable, start: int = 0, stop: int = -1,
+                 chunk: int = 1000) -> Iterator[Tuple[str, str]]:
+    """
+    Stream the recorded calls of a method in fixed-size pages.
+
+    Each page fetches at most ``chunk`` entries from both history lists in
+    one pipelined round trip, so memory use does not grow with the length
+    of the history.
 
-def replay(method) -> None:
+    Args:
+        method: The bound method to read call history for.
+        start: The index of the first call, negative counting from the end.
+        stop: The index of the last call (inclusive), negative counting
+            from the end.
+        chunk: The maximum number of calls fetched per round trip.
+
+    Returns:
+        Iterator[Tuple[str, str]]: The decoded (inputs, output) pairs.
+    """
+    if chunk < 1:
+        raise ValueError("chunk size must be a positive integer")
+    redis_instance = method.__self__._redis
+    base_key = method.__self__._key(method.__qualname__)
+    input_key = f"{base_key}:inputs"
+    output_key = f"{base_key}:outputs"
+
+    # Resolve Redis-style inclusive indices once, against the current length
+    length = _history_length(redis_instance, base_key)
+    if start < 0:
+        start = max(length + start, 0)
+    if stop < 0:
+        stop = length + stop
+    stop = min(stop, length - 1)
+
+    for first in range(start, stop + 1, chunk):
+        last = min(first + chunk - 1, stop)
+        pipe = redis_instance.pipeline(transaction=False)
+        pipe.lrange(input_key, first, last)
+        pipe.lrange(output_key, first, last)
+        inputs, outputs = pipe.execute()
+        for inp, out in zip(inputs, outputs):
+            yield inp.decode("utf-8"), out.decode("utf-8")
+
+
+def _stream_bounds(since: Optional[float],
+                   until: Optional[float]) -> Tuple[str, str]:
+    """
+    Turn a time window into XRANGE ID bounds.
+
+    Args:
+        since: The first Unix time in the window, or None for the oldest.
+        until: The last Unix time in the window (inclusive), or None for
+            the newest.
+
+    Returns:
+        Tuple[str, str]: The first and last stream ID bounds.
+    """
+    first = "-" if since is None else str(int(since * 1000))
+    # Every entry of the last millisecond is included
+    last = "+" if until is None else f"{int(until * 1000)}-{2 ** 64 - 1}"
+    return first, last
+
+
+def _call_entry(entry_id: bytes, fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+    """
+    Decode one stream entry of a call history.
+
+    Args:
+        entry_id: The stream ID of the entry.
+        fields: The raw entry fields.
+
+    Returns:
+        Dict[str, Any]: The entry ``id``, ``args``, ``output``, ``ts`` and
+        ``client_time`` (None when it was not recorded).
+    """
+    # Entries written before the field was renamed call it "duration"
+    client_time = fields.get(b"client_time", fields.get(b"duration"))
+    return {
+        "id": entry_id.decode("utf-8"),
+        "args": fields[b"args"].decode("utf-8"),
+        "output": fields[b"output"].decode("utf-8"),
+        "ts": float(fields[b"ts"]),
+        "client_time": None if client_time is None else float(client_time),
+    }
+
+
+def iter_calls(method: Callable, since: Optional[float] = None,
+               until: Optional[float] = None,
+               chunk: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the calls recorded in a stream history between two times.
+
+    Entries are read with XRANGE pages of ``chunk`` entries, each page
+    starting just after the last entry of the previous one.
+
+    Args:
+        method: The bound method whose history is a stream.
+        since: The Unix time of the first call, or None for the oldest.
+        until: The Unix time of the last call (inclusive), or None for
+            the newest.
+        chunk: The maximum number of calls fetched per round trip.
+
+    Returns:
+        Iterator[Dict[str, Any]]: The decoded entries, oldest first.
+    """
+    if chunk < 1:
+        raise ValueError("chunk size must be a positive integer")
+    redis_instance = method.__self__._redis
+    key = method.__self__._key(f"{method.__qualname__}:calls")
+    first, last = _stream_bounds(since, until)
+    while True:
+        entries = redis_instance.xrange(key, first, last, count=chunk)
+        for entry_id, fields in entries:
+            yield _call_entry(entry_id, fields)
+        if len(entries) < chunk:
+            return
+        first = "(" + entries[-1][0].decode("utf-8")
+
+
+def read_calls(method: Callable, group: str, consumer: str,
+               count: int = 100,
+               block: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Read the next calls of a stream history for a consumer group.
+
+    The group is created on first use, starting from the oldest entry.
+    Every consumer of a group gets different calls; acknowledge them with
+    ack_calls once processed.
+
+    Args:
+        method: The bound method whose history is a stream.
+        group: The consumer group name.
+        consumer: The name of this consumer within the group.
+        count: The maximum number of calls returned.
+        block: Milliseconds to wait for new calls, or None to return at
+            once.
+
+    Returns:
+        List[Dict[str, Any]]: The decoded entries, oldest first.
+    """
+    redis_instance = method.__self__._redis
+    key = method.__self__._key(f"{method.__qualname__}:calls")
+    try:
+        redis_instance.xgroup_create(key, group, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+    response = redis_instance.xreadgroup(group, consumer, {key: ">"},
+                                         count=count, block=block)
+    return [_call_entry(entry_id, fields)
+            for _, entries in response for entry_id, fields in entries]
+
+
+def ack_calls(method: Callable, group: str, ids: Iterable[str]) -> int:
+    """
+    Acknowledge calls processed by a consumer group.
+
+    Args:
+        method: The bound method whose history is a stream.
+        group: The consumer group name.
+        ids: The ``id`` of each processed entry.
+
+    Returns:
+        int: The number of calls acknowledged.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    key = method.__self__._key(f"{method.__qualname__}:calls")
+    return method.__self__._redis.xack(key, group, *ids)
+
+
+def replay(method: Callable, file: Optional[IO[str]] = None,
+           last: Optional[int] = None, chunk: int = 1000,
+           since: Optional[float] = None,
+           until: Optional[float] = None) -> None:
     """
     Display the history of calls of a particular function.
 
+    The history is streamed page by page through iter_history (or
+    iter_calls for a stream history) instead of being loaded in full.
+
     Args:
         method: The bound method to display call history for.
+        file: The file-like object to write to (default: sys.stdout).
+        last: If set, only display the last ``last`` calls.
+        chunk: The maximum number of calls fetched per round trip.
+        since: For a stream history, the Unix time of the first call shown.
+        until: For a stream history, the Unix time of the last call shown.
     """
     # Get the Redis instance from the method's bound instance
     redis_instance = method.__self__._redis
     method_name = method.__qualname__
+    base_key = method.__self__._key(method_name)
 
     # Get the call count
-    count = redis_instance.get(method_name)
+    count = redis_instance.get(base_key)
     if count is None:
         count = 0
     else:
         count = int(count)
 
-    print(f"{method_name} was called {count} times:")
-
-    # Get input and output history
-    input_key = f"{method_name}:inputs"
-    output_key = f"{method_name}:outputs"
+    if _history_stream(method.__self__):
+        _replay_calls(method, count, file, last, chunk, since, until)
+        return
 
-    inputs = redis_instance.lrange(input_key, 0, -1)
-    outputs = redis_instance.lrange(output_key, 0, -1)
+    # A capped, sampled or tailed history holds fewer entries than the count
+    shown = _history_length(redis_instance, base_key)
+    if last is not None:
+        shown = min(shown, max(last, 0))
+    if shown < count:
+        print(f"{method_name} was called {count} times "
+              f"(showing last {shown}):", file=file)
+    else:
+        print(f"{method_name} was called {count} times:", file=file)
 
     # Display each call
-    for inp, out in zip(inputs, outputs):
-        input_str = inp.decode('utf-8')
-        output_str = out.decode('utf-8')
-        print(f"{method_name}(*{input_str}) -> {output_str}")
+    if shown == 0:
+        return
+    for input_str, output_str in iter_history(method, -shown, -1, chunk):
+        print(f"{method_name}(*{input_str}) -> {output_str}", file=file)
+
+
+def _replay_calls(method: Callable, count: int, file: Optional[IO[str]],
+                  last: Optional[int], chunk: int, since: Optional[float],
+                  until: Optional[float]) -> None:
+    """
+    Display a stream history, optionally limited to a time window.
+
+    Args:
+        method: The bound method to display call history for.
+        count: The number of calls counted by count_calls.
+        file: The file-like object to write to (default: sys.stdout).
+        last: If set, only display the last ``last`` calls of the window.
+        chunk: The maximum number of calls fetched per round trip.
+        since: The Unix time of the first call shown.
+        until: The Unix time of the last call shown.
+    """
+    method_name = method.__qualname__
+    redis_instance = method.__self__._redis
+    key = method.__self__._key(f"{method_name}:calls")
+    if since is None and until is None:
+        # A capped, sampled or tailed history holds fewer calls than count
+        shown = redis_instance.xlen(key)
+        if last is not None:
+            shown = min(shown, max(last, 0))
+        selection = f"last {shown}" if shown < count else None
+    else:
+        selection = "calls in the time window"
+    if selection is None:
+        print(f"{method_name} was called {count} times:", file=file)
+    else:
+        print(f"{method_name} was called {count} times "
+              f"(showing {selection}):", file=file)
+
+    if last is None:
+        calls = iter_calls(method, since, until, chunk)
+    else:
+        # The tail of the window, read newest first in one round trip
+        first, final = _stream_bounds(since, until)
+        entries = redis_instance.xrevrange(
+            key, final, first, count=last
+        ) if last > 0 else []
+        calls = (_call_entry(entry_id, fields)
+                 for entry_id, fields in reversed(entries))
+    for call in calls:
+        took = ("" if call["client_time"] is None
+                else f" in {call['client_time'] * 1e3:.3f}ms client time")
+        print(f"{method_name}(*{call['args']}) -> {call['output']}{took}",
+              file=file)
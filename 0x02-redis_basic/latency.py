@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Latency histogram module.
+
+This module contains the LatencyRecorder used by the track_latency
+decorator. Call durations are counted in process into log-scaled buckets
+(four per power of two nanoseconds, so each bucket is at most 25% wide)
+and periodically merged into one Redis hash per method, where the
+histograms of every worker add up.
+"""
+
+import atexit
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Adds bucket counts into a histogram hash and raises its max field
+_MERGE_SCRIPT = """
+local current = tonumber(redis.call("HGET", KEYS[1], "max") or "0")
+if tonumber(ARGV[1]) > current then
+    redis.call("HSET", KEYS[1], "max", ARGV[1])
+end
+for i = 2, #ARGV, 2 do
+    redis.call("HINCRBY", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+
+def bucket_of(nanoseconds: int) -> int:
+    """
+    Get the histogram bucket of a duration.
+
+    Args:
+        nanoseconds: The duration.
+
+    Returns:
+        int: The bucket index, growing with the duration.
+    """
+    bits = nanoseconds.bit_length()
+    if bits < 3:
+        # Durations under 4ns get a bucket of their own
+        return nanoseconds
+    return (bits << 2) | ((nanoseconds >> (bits - 3)) & 3)
+
+
+def bucket_bounds(bucket: int) -> Tuple[int, int]:
+    """
+    Get the range of durations counted in a bucket.
+
+    Args:
+        bucket: The bucket index.
+
+    Returns:
+        Tuple[int, int]: The lowest and highest duration in nanoseconds.
+    """
+    if bucket < 4:
+        return bucket, bucket
+    bits, sub = bucket >> 2, bucket & 3
+    low = (4 | sub) << (bits - 3)
+    return low, low + (1 << (bits - 3)) - 1
+
+
+class LatencyRecorder:
+    """
+    In-process latency buckets merged into Redis on a timer.
+
+    Recording a call only takes a lock and a dict increment. A daemon
+    thread merges the pending buckets of every histogram every
+    ``interval`` seconds with one pipelined script call per histogram,
+    and again at process exit.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        """
+        Initialize the LatencyRecorder instance.
+
+        Args:
+            interval: How often in seconds pending buckets are merged.
+        """
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[int, int]] = {}
+        self._max: Dict[str, int] = {}
+        self._clients: Dict[str, Any] = {}
+        self._merge: Any = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def record(self, client: Any, key: str, nanoseconds: int) -> None:
+        """
+        Count one call in the histogram stored at ``key``.
+
+        Args:
+            client: The Redis client the histogram is merged through.
+            key: The Redis hash holding the histogram.
+            nanoseconds: How long the call took.
+        """
+        bucket = bucket_of(nanoseconds)
+        with self._lock:
+            buckets = self._pending.get(key)
+            if buckets is None:
+                buckets = self._pending[key] = {}
+                self._clients[key] = client
+                if self._thread is None:
+                    self._start()
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+            if nanoseconds > self._max.get(key, 0):
+                self._max[key] = nanoseconds
+
+    def _start(self) -> None:
+        """
+        Start the merging thread (called with the lock held).
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="latency-merge", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        """
+        Merge pending buckets until the process exits.
+        """
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # The buckets were dropped; the next interval carries on
+                pass
+
+    def flush(self) -> None:
+        """
+        Merge every pending bucket into Redis now.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            highest, self._max = self._max, {}
+            clients, self._clients = self._clients, {}
+        pipes: Dict[int, Any] = {}
+        for key, buckets in pending.items():
+            client = clients[key]
+            pipe = pipes.get(id(client))
+            if pipe is None:
+                pipe = pipes[id(client)] = client.pipeline(transaction=False)
+            args: List[int] = [highest.get(key, 0)]
+            for bucket, count in buckets.items():
+                args.extend((bucket, count))
+            if self._merge is None:
+                self._merge = client.register_script(_MERGE_SCRIPT)
+            # The script runs on whichever pipeline it is given
+            self._merge(keys=[key], args=args, client=pipe)
+        for pipe in pipes.values():
+            pipe.execute()
+
+    def stop(self) -> None:
+        """
+        Stop the merging thread and merge what is still pending.
+        """
+        self._stop.set()
+        self.flush()
+
+
+def summarize(histogram: Dict[bytes, bytes]) -> Dict[str, float]:
+    """
+    Compute the count, percentiles and max of a stored histogram.
+
+    Percentiles are the midpoint of the bucket they fall in.
+
+    Args:
+        histogram: The fields of the Redis hash.
+
+    Returns:
+        Dict[str, float]: ``count``, and ``p50``, ``p95``, ``p99`` and
+        ``max`` in seconds (0.0 without any call).
+    """
+    highest = int(histogram.pop(b"max", 0))
+    buckets = sorted((int(bucket), int(count))
+                     for bucket, count in histogram.items())
+    total = sum(count for _, count in buckets)
+    stats = {"count": total, "p50": 0.0, "p95": 0.0, "p99": 0.0,
+             "max": highest / 1e9}
+    for name, quantile in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        rank = quantile * total
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen >= rank:
+                low, high = bucket_bounds(bucket)
+                stats[name] = min((low + high) / 2, highest) / 1e9
+                break
+    return stats
+
+
+# The recorder shared by every decorated method in the process
+recorder = LatencyRecorder()
+atexit.register(recorder.stop)
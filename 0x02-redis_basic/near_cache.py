@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+In-process near cache module.
+
+This module contains a NearCache class that keeps hot Redis values in a
+bounded, expiring LRU inside the process and drops them as soon as Redis
+reports a change, using server-assisted client-side caching
+(CLIENT TRACKING with invalidation messages redirected to a listener).
+"""
+
+import redis
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class NearCache:
+    """
+    Bounded LRU of Redis values kept coherent by CLIENT TRACKING.
+
+    Reads that miss go to Redis over connections with tracking enabled, so
+    the server remembers which keys this process holds and publishes an
+    invalidation to the listener connection whenever one of them changes.
+    Requires Redis 6 or later.
+    """
+
+    def __init__(self, pool: redis.ConnectionPool, maxsize: int = 1024,
+                 ttl: float = 60.0, poll_interval: float = 1.0) -> None:
+        """
+        Initialize the NearCache instance.
+
+        Opens a dedicated listener connection subscribed to the
+        invalidation channel and a pool of reader connections that enable
+        tracking, redirected to the listener, every time they connect.
+
+        Args:
+            pool: The pool whose connection settings are reused.
+            maxsize: The maximum number of values kept in process.
+            ttl: The maximum age in seconds of a value kept in process.
+            poll_interval: How often in seconds the listener thread checks
+                whether it was closed.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._pending: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._closed = threading.Event()
+        self._poll_interval = poll_interval
+
+        self._connection_class = pool.connection_class
+        # Settings bound to the original pool are not carried over
+        self._connection_kwargs = {
+            name: value for name, value in pool.connection_kwargs.items()
+            if not name.startswith(("maint_notifications", "orig_"))
+        }
+        if int(redis.__version__.split(".")[0]) >= 5:
+            # Invalidations are read as RESP2 pub/sub messages
+            self._connection_kwargs["protocol"] = 2
+        self._listener = self._connect_listener()
+        self._pool = redis.ConnectionPool(
+            connection_class=self._connection_class,
+            redis_connect_func=self._enable_tracking,
+            **self._connection_kwargs
+        )
+        self._redis = redis.Redis(connection_pool=self._pool)
+
+        self._thread = threading.Thread(
+            target=self._listen, name="near-cache-invalidations", daemon=True
+        )
+        self._thread.start()
+
+    def _connect_listener(self) -> Any:
+        """
+        Open the connection that receives invalidation messages.
+
+        Returns:
+            Any: The connected and subscribed connection.
+        """
+        connection = self._connection_class(**self._connection_kwargs)
+        connection.connect()
+        connection.send_command("CLIENT", "ID")
+        self._listener_id = int(connection.read_response())
+        connection.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+        connection.read_response()
+        return connection
+
+    def _enable_tracking(self, connection: Any) -> None:
+        """
+        Turn tracking on for a newly connected reader connection.
+
+        Args:
+            connection: The reader connection that just connected.
+        """
+        connection.on_connect()
+        connection.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", self._listener_id
+        )
+        connection.read_response()
+
+    def _listen(self) -> None:
+        """
+        Apply invalidation messages until the near cache is closed.
+
+        If the listener connection drops, messages may have been lost, so
+        every value is dropped and the reader connections are reset to
+        redirect to the new listener.
+        """
+        while not self._closed.is_set():
+            try:
+                if not self._listener.can_read(timeout=self._poll_interval):
+                    continue
+                message = self._listener.read_response()
+            except (redis.ConnectionError, redis.TimeoutError, OSError):
+                if self._closed.is_set():
+                    return
+                self.clear()
+                try:
+                    self._listener = self._connect_listener()
+                except (redis.ConnectionError, OSError):
+                    time.sleep(self._poll_interval)
+                    continue
+                self._pool.disconnect()
+                continue
+            if not isinstance(message, list) or len(message) != 3:
+                continue
+            if message[0] != b"message":
+                continue
+            if message[2] is None:
+                # The server flushed its database
+                self.clear()
+            else:
+                self.invalidate(key.decode("utf-8") for key in message[2])
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value from the process, reading through to Redis on a miss.
+
+        Args:
+            key: The key to retrieve data for.
+
+        Returns:
+            The data from Redis, or None if key doesn't exist.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+            # An invalidation arriving during the read cancels the token
+            token = object()
+            self._pending[key] = token
+
+        value = self._redis.get(key)
+
+        with self._lock:
+            if self._pending.get(key) is token:
+                del self._pending[key]
+                if value is not None:
+                    self._entries[key] = (value, now + self.ttl)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        """
+        Drop keys from the process.
+
+        Args:
+            keys: The keys that changed in Redis.
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._pending.pop(key, None)
+                self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        """
+        Drop every value kept in the process.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the hit, miss and invalidation counters.
+
+        Returns:
+            Dict[str, int]: The counters and the current number of values.
+        """
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def close(self) -> None:
+        """
+        Stop the listener thread and close every connection.
+        """
+        self._closed.set()
+        self._thread.join()
+        self._listener.disconnect()
+        self._pool.disconnect()
+        self.clear()
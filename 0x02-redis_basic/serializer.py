@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Value serializer module.
+
+This module contains the serializers a Cache uses to turn values into the
+bytes stored in Redis and back. RawSerializer keeps Redis' own encoding
+(every value comes back as bytes); TaggedSerializer prefixes a compact
+binary type tag so values come back with their original type.
+"""
+
+import struct
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError:  # numpy arrays are only supported when it is installed
+    numpy = None
+
+
+# Marks a tagged value; any other stored value is returned as raw bytes
+MAGIC = b"\xff\x00"
+
+_INT64 = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")
+_DIM = struct.Struct("<Q")
+
+
+class RawSerializer:
+    """
+    Serializer storing values the way redis-py encodes them.
+
+    str, int and float are stored as their text, and every value is read
+    back as bytes.
+    """
+
+    def dumps(self, value: Any) -> Any:
+        """
+        Leave a value for redis-py to encode.
+
+        Args:
+            value: The value to store (str, bytes, int or float).
+
+        Returns:
+            Any: The value unchanged.
+        """
+        return value
+
+    def loads(self, data: bytes) -> Any:
+        """
+        Return stored bytes unchanged.
+
+        Args:
+            data: The bytes read from Redis.
+
+        Returns:
+            Any: The bytes unchanged.
+        """
+        return data
+
+
+class TaggedSerializer:
+    """
+    Serializer keeping the type of each value in a one-byte tag.
+
+    Supports None, bool, int, float, str, bytes, and lists, tuples and
+    dicts of those, plus numpy arrays (except arrays of Python objects)
+    when numpy is installed; numpy scalars are stored as, and read back
+    as, the matching Python value. Values
+    stored without the tag header (such as keys written by RawSerializer)
+    are still read back as raw bytes.
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        Encode a value with its type tag.
+
+        Args:
+            value: The value to store.
+
+        Returns:
+            bytes: The tagged encoding.
+        """
+        return MAGIC + _encode(value)
+
+    def loads(self, data: bytes) -> Any:
+        """
+        Decode a tagged value, or return untagged data as raw bytes.
+
+        Args:
+            data: The bytes read from Redis.
+
+        Returns:
+            Any: The value with its original type.
+        """
+        if not data.startswith(MAGIC):
+            return data
+        # Fast path for scalars, without building a memoryview
+        decoder = _SCALARS.get(data[2:3])
+        if decoder is not None:
+            return decoder(data[3:])
+        value, _ = _decode(memoryview(data), len(MAGIC))
+        return value
+
+
+def _encode_sized(value: Any) -> bytes:
+    """
+    Encode a nested value prefixed with its length.
+
+    Args:
+        value: The container item to encode.
+
+    Returns:
+        bytes: The length and the tagged encoding.
+    """
+    encoded = _encode(value)
+    return _LENGTH.pack(len(encoded)) + encoded
+
+
+def _encode(value: Any) -> bytes:
+    """
+    Encode a value as a type tag followed by its payload.
+
+    Args:
+        value: The value to encode.
+
+    Returns:
+        bytes: The tagged encoding, without the MAGIC header.
+    """
+    if value is None:
+        return b"N"
+    if value is True:
+        return b"T"
+    if value is False:
+        return b"F"
+    if isinstance(value, bytes):
+        return b"b" + value
+    if isinstance(value, str):
+        return b"s" + value.encode("utf-8")
+    if isinstance(value, int):
+        if -2 ** 63 <= value < 2 ** 63:
+            return b"i" + _INT64.pack(value)
+        return b"I" + str(value).encode("ascii")
+    if isinstance(value, float):
+        return b"f" + _FLOAT.pack(value)
+    if isinstance(value, (list, tuple)):
+        tag = b"l" if isinstance(value, list) else b"t"
+        parts = [tag, _LENGTH.pack(len(value))]
+        parts.extend(_encode_sized(item) for item in value)
+        return b"".join(parts)
+    if isinstance(value, dict):
+        parts = [b"d", _LENGTH.pack(len(value))]
+        for key, item in value.items():
+            parts.append(_encode_sized(key))
+            parts.append(_encode_sized(item))
+        return b"".join(parts)
+    if numpy is not None and isinstance(value, numpy.generic):
+        # numpy scalars are stored as the matching Python value
+        item = value.item()
+        if isinstance(item, numpy.generic):
+            raise TypeError(f"cannot serialize {type(value).__name__} values")
+        return _encode(item)
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("cannot serialize numpy arrays of Python objects")
+        dtype = value.dtype.str.encode("ascii")
+        header = [b"a", _LENGTH.pack(len(dtype)), dtype,
+                  _LENGTH.pack(value.ndim)]
+        header.extend(_DIM.pack(dim) for dim in value.shape)
+        return b"".join(header) + numpy.ascontiguousarray(value).tobytes()
+    raise TypeError(f"cannot serialize {type(value).__name__} values")
+
+
+def _decode_items(view: memoryview, offset: int,
+                  count: int) -> Tuple[List[Any], int]:
+    """
+    Decode ``count`` length-prefixed items.
+
+    Args:
+        view: The whole encoded value.
+        offset: Where the first item starts.
+        count: The number of items.
+
+    Returns:
+        Tuple[List[Any], int]: The items and the offset after the last one.
+    """
+    items = []
+    for _ in range(count):
+        (size,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        item, _ = _decode(view[:offset + size], offset)
+        items.append(item)
+        offset += size
+    return items, offset
+
+
+def _decode(view: memoryview, offset: int) -> Tuple[Any, int]:
+    """
+    Decode the tagged value starting at ``offset``.
+
+    Scalar payloads run to the end of ``view``, so callers slice the view
+    to the item's length first.
+
+    Args:
+        view: The encoded bytes, ending where the value ends.
+        offset: Where the tag is.
+
+    Returns:
+        Tuple[Any, int]: The value and the offset just after it.
+    """
+    tag = bytes(view[offset:offset + 1])
+    offset += 1
+    decoder = _SCALARS.get(tag)
+    if decoder is not None:
+        return decoder(view[offset:]), len(view)
+    if tag in (b"l", b"t", b"d"):
+        (count,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if tag == b"d":
+            flat, offset = _decode_items(view, offset, count * 2)
+            return dict(zip(flat[::2], flat[1::2])), offset
+        items, offset = _decode_items(view, offset, count)
+        return (items if tag == b"l" else tuple(items)), offset
+    if tag == b"a" and numpy is not None:
+        (size,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        dtype = bytes(view[offset:offset + size]).decode("ascii")
+        offset += size
+        (ndim,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        shape = []
+        for _ in range(ndim):
+            shape.append(_DIM.unpack_from(view, offset)[0])
+            offset += _DIM.size
+        array = numpy.frombuffer(view[offset:], dtype=dtype).reshape(shape)
+        return array.copy(), len(view)
+    raise ValueError(f"unknown serializer tag {tag!r}")
+
+
+_SCALARS: Dict[bytes, Callable[[memoryview], Any]] = {
+    b"N": lambda payload: None,
+    b"T": lambda payload: True,
+    b"F": lambda payload: False,
+    b"b": bytes,
+    b"s": lambda payload: str(payload, "utf-8"),
+    b"i": lambda payload: _INT64.unpack(payload)[0],
+    b"I": lambda payload: int(bytes(payload)),
+    b"f": lambda payload: _FLOAT.unpack(payload)[0],
+}
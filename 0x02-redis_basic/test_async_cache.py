@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test file for the asyncio AsyncCache class and areplay
+"""
+import asyncio
+from async_cache import AsyncCache, areplay
+from serializer import TaggedSerializer
+
+
+async def main() -> None:
+    """Run the AsyncCache checks on one event loop"""
+    print("=== Testing AsyncCache ===")
+
+    cache = AsyncCache(namespace="test_async:")
+    await cache.reset()
+
+    key = await cache.store("hello")
+    print(f"get_str: {await cache.get_str(key)}")
+    key = await cache.store(42)
+    print(f"get_int: {await cache.get_int(key)}")
+    typed = AsyncCache(namespace="test_async:typed:",
+                       serializer=TaggedSerializer())
+    key = await typed.store(42)
+    print(f"Typed get_str: {await typed.get_str(key)!r} (should be '42')")
+    await typed.reset()
+
+    # Many concurrent stores, each its own transaction
+    keys = await asyncio.gather(*(cache.store(f"v{i}") for i in range(1000)))
+    values = await cache.get_many(keys, fn=lambda d: d.decode("utf-8"))
+    print(f"Concurrent stores read back: {values[:3]}... ({len(values)})")
+
+    count = await cache.get(cache._key(cache.store.__qualname__))
+    print(f"Call count: {count} (should be b'1002')")
+
+    print("\nReplay of the last 3 calls:")
+    await areplay(cache.store, last=3)
+
+    await cache.reset()
+    await cache.close()
+
+
+async def round_trip(cache: AsyncCache, value: str) -> str:
+    """Store a value and read it back on the running event loop"""
+    return await cache.get_str(await cache.store(value))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+    print("\n=== Testing one AsyncCache across event loops ===")
+    shared = AsyncCache(namespace="test_async:loops:")
+    print(f"First loop: {asyncio.run(round_trip(shared, 'one'))}")
+    print(f"Second loop: {asyncio.run(round_trip(shared, 'two'))}")
+    fresh = AsyncCache(namespace="test_async:loops:")
+    print(f"New instance, third loop: "
+          f"{asyncio.run(round_trip(fresh, 'three'))}")
+    asyncio.run(shared.reset())
+    print("\n✅ All tests completed!")
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test file for the bounded and sampled call_history options
+"""
+from exercise import Cache, replay
+
+print("=== Testing bounded call history ===")
+
+cache = Cache(flush=True)
+cache.history_maxlen = 3
+
+for i in range(10):
+    cache.store(f"value_{i}")
+
+input_key = f"{cache.store.__qualname__}:inputs"
+output_key = f"{cache.store.__qualname__}:outputs"
+print(f"Inputs kept: {cache._redis.llen(input_key)} (should be 3)")
+print(f"Outputs kept: {cache._redis.llen(output_key)} (should be 3)")
+print(f"Call count: {cache.get(cache.store.__qualname__)} (should be b'10')")
+replay(cache.store)
+
+print("\n=== Testing sampled call history ===")
+
+cache = Cache(flush=True)
+cache.history_sample = 10
+
+cache.store_many(range(1000))
+recorded = cache._redis.llen(input_key)
+print(f"Recorded {recorded} of 1000 calls (should be close to 100)")
+print(f"Call count: {cache.get(cache.store.__qualname__)} (should be b'1000')")
+
+print("\n✅ All tests completed!")
@@ -6,7 +6,7 @@ Cache = __import__('exercise').Cache
 
 print("=== Testing call_history decorator ===")
 
-cache = Cache()
+cache = Cache(flush=True)
 
 # Test with different data types
 test_data = ["first", "second", 42, 3.14, b"bytes"]
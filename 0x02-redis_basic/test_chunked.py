@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test file for chunked storage of large values and buffer sources
+"""
+import io
+
+from exercise import Cache
+
+
+class SmallChunks(Cache):
+    """Cache splitting values above 1 KiB"""
+
+    chunk_size = 1024
+
+
+cache = SmallChunks(flush=True)
+blob = bytes(range(256)) * 40
+
+print("=== Testing large bytes ===")
+key = cache.store(blob)
+print(f"Stored as a manifest: {cache._redis.get(key)!r}")
+print(f"get returns the whole value: {cache.get(key) == blob}")
+print(f"Chunk sizes: {[len(chunk) for chunk in cache.iter_chunks(key)]}")
+
+print("\n=== Testing buffer sources ===")
+view_key = cache.store(memoryview(blob)[100:3100])
+print(f"memoryview slice: {cache.get(view_key) == blob[100:3100]}")
+array_key = cache.store(bytearray(b"small buffer"))
+print(f"Small bytearray is one plain value: {cache.get(array_key)}")
+file_key = cache.store(io.BytesIO(blob))
+print(f"File-like source: {cache.get(file_key) == blob}")
+
+print("\n=== Testing get_into ===")
+buffer = bytearray(len(blob))
+print(f"Bytes written: {cache.get_into(file_key, buffer)} "
+      f"(should be {len(blob)})")
+print(f"Buffer filled: {buffer == blob}")
+try:
+    cache.get_into(file_key, bytearray(10))
+except ValueError as e:
+    print(f"Small buffer rejected: {e}")
+print(f"Missing key: {cache.get_into('missing', buffer)}")
+
+print("\n=== Testing get_many and delete ===")
+plain = cache.store("plain")
+print(f"get_many mixes both: "
+      f"{cache.get_many([plain, key]) == [b'plain', blob]}")
+print(f"Delete: {cache.delete(key)}")
+print(f"Chunk keys left: {cache._redis.keys(key + '*')}")
+
+print("\n=== Testing history ===")
+print(f"store calls counted: {cache.get(cache.store.__qualname__)} "
+      "(should be b'5')")
+
+print("\n✅ All tests completed!")
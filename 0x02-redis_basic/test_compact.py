@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test file for the hash-bucketed compact storage mode of Cache
+"""
+import io
+import uuid
+
+from exercise import Cache, replay
+from serializer import TaggedSerializer
+
+if __name__ == "__main__":
+    namespace = f"test:compact:{uuid.uuid4()}:"
+    cache = Cache(namespace=namespace, compact=True)
+    client = cache._redis
+
+    print("=== Testing store and get ===")
+    key = cache.store("hello")
+    print(f"Key: {key!r} ({len(key) - len(namespace)} chars "
+          "after the namespace)")
+    print(f"get: {cache.get(key)}")
+    print(f"get_str: {cache.get_str(key)}")
+    print(f"get_int: {cache.get_int(cache.store(42))}")
+    bucket, field = cache._locate(key)
+    print(f"Stored in bucket {bucket!r}, field {field!r}")
+    print(f"Bucket encoding: {client.object('encoding', bucket)}")
+
+    print("\n=== Testing store_many and get_many ===")
+    keys = cache.store_many(range(1000))
+    values = cache.get_many(keys + ["missing"], fn=int)
+    print(f"Round trip intact: {values[:-1] == list(range(1000))}")
+    print(f"Missing key: {values[-1]}")
+    buckets = {cache._locate(key)[0] for key in keys}
+    print(f"Buckets used: {len(buckets)} (should be 8 or 9)")
+    encodings = {client.object("encoding", bucket) for bucket in buckets}
+    print(f"All listpack/ziplist encoded: {b'hashtable' not in encodings}")
+
+    print("\n=== Testing values that are not packed ===")
+    big = cache.store(b"x" * 1000)
+    expiring = cache.store("short-lived", ttl=60)
+    print(f"Large value packed: {big.startswith(cache._compact_prefix)}")
+    print(f"Expiring value packed: "
+          f"{expiring.startswith(cache._compact_prefix)}")
+    print(f"TTL kept: {0 < client.ttl(expiring) <= 60}")
+    mixed = cache.get_many([big, key, expiring])
+    print(f"Mixed get_many: {[len(mixed[0]), mixed[1], mixed[2]]}")
+
+    print("\n=== Testing delete ===")
+    print(f"Deleted: {cache.delete(key)}, again: {cache.delete(key)}")
+    print(f"get after delete: {cache.get(key)}")
+
+    print("\n=== Testing typed values and history ===")
+    typed = Cache(namespace=namespace + "typed:", compact=True,
+                  serializer=TaggedSerializer())
+    handle = typed.store([1, "two", 3.0])
+    print(f"Typed value: {typed.get(handle)}")
+    out = io.StringIO()
+    replay(typed.store, file=out)
+    print(f"Replay lists the compact key: {handle in out.getvalue()}")
+
+    print("\n=== Testing separate instances share the id counter ===")
+    other = Cache(namespace=namespace, compact=True)
+    first, second = cache.store("a"), other.store("b")
+    print(f"Distinct keys: {first != second}, values: "
+          f"{cache.get(second)}, {other.get(first)}")
+
+    print("\n=== Testing one instance per store keeps buckets full ===")
+    short = [Cache(namespace=namespace + "short:", compact=True).store(i)
+             for i in range(1000)]
+    reader = Cache(namespace=namespace + "short:", compact=True)
+    sizes = [client.hlen(bucket)
+             for bucket in {reader._locate(key)[0] for key in short}]
+    print(f"1000 instances filled {len(sizes)} buckets (should be 8), "
+          f"{sizes.count(128)} of them full (should be 7)")
+    print(f"Values intact: "
+          f"{reader.get_many(short) == [b'%d' % i for i in range(1000)]}")
+    reader.reset()
+
+    print("\n=== Testing unsupported combinations ===")
+    try:
+        Cache(namespace=namespace, compact=True, dedup=True)
+        print("No error raised")
+    except ValueError as error:
+        print(f"ValueError: {error}")
+
+    print("\n=== Testing regular keys starting with @ ===")
+    plain = Cache()
+    client.set("@abc", "x")
+    client.set("@config", "hello")
+    print(f"Plain cache get: {plain.get('@abc')}, {plain.get('@config')}")
+    print(f"Plain cache get_many: {plain.get_many(['@abc', '@config'])}")
+    print(f"Plain cache delete: {plain.delete('@config')}")
+    client.set("@config", "again")
+    print(f"Compact cache, non-hex key: "
+          f"{Cache(compact=True).get('@config')}")
+    client.delete("@abc", "@config")
+
+    print(f"\nReset removed {cache.reset()} keys")
+    print("\n✅ All tests completed!")
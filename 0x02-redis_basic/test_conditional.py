@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test file for pooled sessions and conditional revalidation in web.py
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web import cache_with_expiration, configure_session, _http_get
+
+responses = {200: 0, 304: 0}
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Local origin serving a page with an ETag and keep-alive"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        """Answer 304 when the ETag matches, the full page otherwise"""
+        if self.headers.get("If-None-Match") == '"v1"':
+            responses[304] += 1
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        responses[200] += 1
+        body = b"<html>" + b"x" * 10000 + b"</html>"
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet"""
+
+
+@cache_with_expiration(1, stale=10)
+def get_etag_page(url: str) -> str:
+    """Fetch a page from the local origin over the shared session"""
+    return _http_get(url)
+
+
+if __name__ == "__main__":
+    configure_session(pool_size=4, timeout=(1.0, 5.0))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/?t={time.time()}"
+
+    print("=== Testing conditional revalidation ===")
+    content = get_etag_page(url)
+    print(f"Miss fetched {len(content)} characters")
+
+    time.sleep(1.5)
+    page = get_etag_page.cached_page(url)
+    print(f"Stale hit served while revalidating: stale={page.stale}")
+    time.sleep(0.5)
+
+    page = get_etag_page.cached_page(url)
+    print(f"After revalidation: stale={page.stale}, same content: "
+          f"{page.content == content}")
+    print(f"Full answers: {responses[200]} (should be 1), "
+          f"304 answers: {responses[304]} (should be 1)")
+
+    server.shutdown()
+    print("\n✅ All tests completed!")
@@ -6,7 +6,7 @@ Cache = __import__("exercise").Cache
 
 print("=== Testing count_calls decorator ===")
 
-cache = Cache()
+cache = Cache(flush=True)
 
 # Test that the store method is decorated
 print(f"Store method qualname: {cache.store.__qualname__}")
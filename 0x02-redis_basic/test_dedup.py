@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test file for the content-addressed (dedup) store mode
+"""
+from exercise import Cache
+
+print("=== Testing dedup store mode ===")
+
+cache = Cache(flush=True, dedup=True)
+
+first = cache.store("same payload")
+second = cache.store("same payload")
+other = cache.store("other payload")
+print(f"Identical values share a key: {first == second}")
+print(f"Different values get different keys: {first != other}")
+print(f"Value read back: {cache.get(first)}")
+
+keys = cache.store_many(["same payload", "bulk", "bulk"])
+print(f"store_many reuses keys: {keys[0] == first and keys[1] == keys[2]}")
+print(f"Stats: {cache.dedup_stats()}")
+
+print("\n=== Testing reference counted deletes ===")
+for _ in range(2):
+    cache.delete(first)
+    print(f"After delete, value still there: {cache.get(first)}")
+cache.delete(first)
+print(f"After the last reference: {cache.get(first)} (should be None)")
+print(f"Deleting again: {cache.delete(first)} (should be False)")
+print(f"Stats: {cache.dedup_stats()}")
+
+print("\n=== Testing a value lost behind its reference ===")
+lost = cache.store("payload")
+cache._redis.delete(lost)
+again = cache.store("payload")
+print(f"Same key: {again == lost}, value rewritten: {cache.get(again)}")
+cache._redis.delete(lost)
+cache.store_many(["payload"])
+print(f"Rewritten by store_many: {cache.get(lost)}")
+
+print("\n=== Testing plain mode is unchanged ===")
+plain = Cache()
+print(f"Random keys differ: {plain.store('x') != plain.store('x')}")
+key = plain.store("gone")
+print(f"Plain delete: {plain.delete(key)}, value: {plain.get(key)}")
+
+print("\n✅ All tests completed!")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test file for the batched web.get_pages function
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web import get_access_count, get_page, get_pages
+
+
+origin_hits = 0
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Local origin answering after a delay, failing on /broken"""
+
+    def do_GET(self) -> None:
+        """Answer with the path after 0.5 seconds, or a closed socket"""
+        global origin_hits
+        origin_hits += 1
+        time.sleep(0.5)
+        if self.path.startswith("/broken"):
+            self.close_connection = True
+            return
+        body = f"<html>{self.path}</html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet"""
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    run = int(time.time())
+    urls = [f"{base}/page{i}?run={run}" for i in range(8)]
+
+    print("=== Testing get_pages ===")
+    get_page(urls[0])  # one URL is already cached
+
+    start = time.time()
+    results = get_pages(urls + [urls[1], f"{base}/broken?run={run}"])
+    print(f"Fetched 7 misses concurrently in {time.time() - start:.2f}s")
+    print(f"Results in input order: "
+          f"{all(f'/page{i}?' in r for i, r in enumerate(results[:8]))}")
+    print(f"Duplicate URL served: {results[8] == results[1]}")
+    print(f"Broken URL isolated: {type(results[9]).__name__} "
+          f"caused by {type(results[9].__cause__).__name__}")
+    print(f"Access counts: {get_access_count(urls[0])} (should be 2), "
+          f"{get_access_count(urls[1])} (should be 2), "
+          f"{get_access_count(urls[2])} (should be 1)")
+
+    print("\n=== Testing get_pages backs off a failing origin ===")
+    hits = origin_hits
+    again = get_pages([f"{base}/broken?run={run}", urls[3]])
+    print(f"Backing off: {type(again[0]).__name__}, "
+          f"retry in {again[0].retry_after:.1f}s")
+    print(f"Origin requests: {origin_hits - hits} (should be 0)")
+
+    server.shutdown()
+    print("\n✅ All tests completed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test file for the top-K hot URL tracking of web.get_page
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import web
+from web import configure_hot_urls, get_page, hot_urls, _hot_key, _redis
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Local origin answering every GET with a small page"""
+
+    def do_GET(self) -> None:
+        """Answer with a page naming the path"""
+        body = f"<html>{self.path}</html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet"""
+
+
+def ours(base: str, minutes: int = 1):
+    """Get the hot URLs of this run, by page name"""
+    return [(url[len(base) + 1:], hits)
+            for url, hits in hot_urls(100, minutes)
+            if url.startswith(base)]
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/{time.time()}"
+    _redis.delete(_hot_key())
+
+    print("=== Testing the most accessed URLs ===")
+    for rank, hits in enumerate((30, 20, 10, 5)):
+        for _ in range(hits):
+            get_page(f"{base}/page{rank}")
+    top = ours(base)
+    print(f"Top 3: {top[:3]}")
+    counted = all(int(_redis.get(f"count:{base}/{page}")) == hits
+                  for page, hits in top)
+    print(f"Counts match count:{{url}}: {counted}")
+
+    print("\n=== Testing earlier minutes add up ===")
+    earlier = _hot_key(int(time.time() // 60) - 2)
+    _redis.zadd(earlier, {f"{base}/page3": 100})
+    print(f"Last 5 minutes: {dict(ours(base, 5))['page3']} hits "
+          "for page3 (should be 105)")
+    print(f"Last minute only: {dict(ours(base))['page3']} hits "
+          "for page3 (should be 5)")
+    print(f"Ranked first over 5 minutes: {ours(base, 5)[0][0]}")
+    _redis.delete(earlier)
+
+    print("\n=== Testing the fixed footprint ===")
+    configure_hot_urls(size=10, minutes=5)
+    for i in range(200):
+        get_page(f"{base}/cold{i}")
+    size = _redis.zcard(_hot_key())
+    print(f"Bucket holds {size} URLs after 204 distinct ones "
+          f"(at most 20): {size <= 20}")
+    ttl = _redis.ttl(_hot_key())
+    print(f"Bucket expires after the window: {0 < ttl <= 5 * 60 + 60}")
+    configure_hot_urls()
+
+    print("\n=== Testing write-behind counting ===")
+    _redis.delete(_hot_key())
+    web.enable_write_behind(max_lag=60)
+    for _ in range(7):
+        get_page(f"{base}/page0")
+    web.disable_write_behind()
+    print(f"Buffered hits tracked: {dict(ours(base))['page0']} "
+          "(should be 7)")
+
+    print("\n=== Testing invalid settings ===")
+    try:
+        configure_hot_urls(size=0)
+        print("No error raised")
+    except ValueError as error:
+        print(f"ValueError: {error}")
+
+    server.shutdown()
+    print("\n✅ All tests completed!")
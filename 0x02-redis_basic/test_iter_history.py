@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Test file for streaming call history with iter_history and replay
+"""
+import io
+from exercise import Cache, iter_history, replay
+
+print("=== Testing iter_history ===")
+
+cache = Cache(flush=True)
+cache.store_many(f"value_{i}" for i in range(25))
+
+pairs = list(iter_history(cache.store, chunk=10))
+print(f"Streamed {len(pairs)} calls in pages of 10 (should be 25)")
+print(f"First call: {pairs[0][0]}")
+
+window = list(iter_history(cache.store, 5, 7, chunk=2))
+print(f"Calls 5 to 7: {[inp for inp, _ in window]}")
+
+print("\n=== Testing replay tail mode ===")
+replay(cache.store, last=3)
+
+print("\n=== Testing replay to a file-like object ===")
+buffer = io.StringIO()
+replay(cache.store, file=buffer, chunk=4)
+lines = buffer.getvalue().splitlines()
+print(f"Header: {lines[0]}")
+print(f"Lines written: {len(lines)} (should be 26)")
+
+print("\n✅ All tests completed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test file for the track_latency decorator and latency_stats
+"""
+import time
+import timeit
+
+import latency
+from exercise import Cache, latency_stats, track_latency
+
+print("=== Testing bucket bounds ===")
+ok = all(latency.bucket_bounds(latency.bucket_of(n))[0] <= n
+         <= latency.bucket_bounds(latency.bucket_of(n))[1]
+         for n in list(range(2000)) + [10 ** 6, 123456789, 2 ** 40 + 7])
+print(f"Every duration falls inside its bucket: {ok}")
+
+
+class Timed(Cache):
+    """Cache with a method of known duration"""
+
+    latency_tracking = True
+
+    @track_latency
+    def nap(self, seconds: float) -> None:
+        """Sleep for the given time"""
+        time.sleep(seconds)
+
+
+cache = Timed(flush=True)
+
+print("\n=== Testing recorded latencies ===")
+for _ in range(95):
+    cache.nap(0.001)
+for _ in range(5):
+    cache.nap(0.02)
+stats = latency_stats(cache.nap)
+print(f"Count: {stats['count']} (should be 100)")
+print(f"p50 around 1ms: {0.0009 < stats['p50'] < 0.0025}")
+print(f"p99 around 20ms: {0.015 < stats['p99'] < 0.03}")
+print(f"max at least 20ms: {stats['max'] >= 0.02}")
+
+print("\n=== Testing workers aggregate ===")
+other = Timed()
+other.nap(0.001)
+print(f"Count after another instance: {latency_stats(cache.nap)['count']} "
+      "(should be 101)")
+
+print("\n=== Testing store and get are tracked ===")
+key = cache.store("value")
+cache.get_str(key)
+print(f"store calls: {latency_stats(cache.store)['count']} (should be 1)")
+print(f"get calls: {latency_stats(cache.get)['count']} (should be 1)")
+
+print("\n=== Testing tracking is off by default ===")
+plain_cache = Cache()
+before = latency_stats(plain_cache.get)["count"]
+plain_cache.get(plain_cache.store("value"))
+latency.recorder.flush()
+print(f"Untracked get recorded: "
+      f"{latency_stats(plain_cache.get)['count'] - before} (should be 0)")
+
+print("\n=== Measuring overhead ===")
+
+
+def plain() -> None:
+    """Do nothing"""
+
+
+timed = track_latency(lambda self: None)
+number = 200000
+base = timeit.timeit(plain, number=number)
+cost = timeit.timeit(lambda: timed(cache), number=number)
+print(f"Overhead per call under 5us: {(cost - base) / number * 1e6 < 5}")
+
+print("\n✅ All tests completed!")
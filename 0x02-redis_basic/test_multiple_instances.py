@@ -7,22 +7,38 @@ Cache = __import__("exercise").Cache
 print("=== Testing decorator with multiple instances ===")
 
 # First instance
-cache1 = Cache()
+cache1 = Cache(flush=True)
 cache1.store(b"data1")
 cache1.store(b"data2")
 count1 = cache1.get(cache1.store.__qualname__)
 print(f"Cache1 count after 2 stores: {count1}")
 
-# Second instance (should share the same counter due to Redis)
-cache2 = Cache()  # This will flushdb, resetting counters
+# Second instance (shares the counter and no longer flushes on init)
+cache2 = Cache()
 cache2.store(b"data3")
 count2 = cache2.get(cache2.store.__qualname__)
-print(f"Cache2 count after 1 store (new instance): {count2}")
+print(f"Cache2 count after 1 more store (shared counter): {count2}")
 
-# Add more to cache2
-cache2.store(b"data4")
-cache2.store(b"data5")
-count2_after = cache2.get(cache2.store.__qualname__)
-print(f"Cache2 count after 3 total stores: {count2_after}")
+# Both instances use the same shared connection pool
+same_pool = cache1._redis.connection_pool is cache2._redis.connection_pool
+print(f"Instances share a connection pool: {same_pool}")
+
+# Namespaced instances keep separate counters and can be reset cheaply
+worker = Cache(namespace="worker:1:")
+worker.store(b"data4")
+worker.store(b"data5")
+count3 = worker.get(worker._key(worker.store.__qualname__))
+print(f"Namespaced count after 2 stores: {count3}")
+
+deleted = worker.reset()
+print(f"Namespaced reset deleted {deleted} keys")
+count1_after = cache1.get(cache1.store.__qualname__)
+print(f"Cache1 count untouched by the reset: {count1_after}")
+
+try:
+    cache1.reset()
+    print("Reset without a namespace: no error raised")
+except ValueError as error:
+    print(f"Reset without a namespace refused: {error}")
 
 print("\n✅ Multiple instances test completed!")
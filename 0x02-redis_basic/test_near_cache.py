@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Test file for the in-process near cache (requires a local redis-server)
+"""
+import time
+from exercise import Cache
+
+print("=== Testing near cache ===")
+
+cache = Cache(flush=True)
+near = cache.enable_near_cache(maxsize=2, ttl=30)
+
+key = cache.store("hot value")
+print(f"First read (miss): {cache.get_str(key)}")
+print(f"Second read (hit): {cache.get_str(key)}")
+print(f"Stats after two reads: {near.stats()}")
+
+# A write from any client makes Redis push an invalidation
+cache._redis.set(key, "new value")
+time.sleep(0.1)
+print(f"Read after the write: {cache.get_str(key)} (should be 'new value')")
+print(f"Stats after invalidation: {near.stats()}")
+
+# The least recently used value is evicted beyond maxsize
+keys = cache.store_many(["a", "b", "c"])
+for k in keys:
+    cache.get(k)
+print(f"Values kept in process: {near.stats()['size']} (should be 2)")
+
+cache.disable_near_cache()
+print("\n✅ All tests completed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test file for negative caching and failure backoff in web.get_page
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web import OriginUnavailable, cache_with_expiration, _http_get, _redis
+
+origin_hits = 0
+failing = True
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Local origin answering 500 while ``failing`` is set"""
+
+    def do_GET(self) -> None:
+        """Answer with an error or a page, after a short delay"""
+        global origin_hits
+        origin_hits += 1
+        time.sleep(0.2)
+        body = b"<html>back</html>"
+        self.send_response(500 if failing else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet"""
+
+
+@cache_with_expiration(10, stale=10, failure_backoff=0.5, max_backoff=2)
+def get_flaky(url: str) -> str:
+    """Fetch a page with a short failure backoff"""
+    return _http_get(url)
+
+
+def attempt(url: str) -> str:
+    """Fetch a page, naming the error instead of raising it"""
+    try:
+        return get_flaky(url)
+    except OriginUnavailable as error:
+        return f"unavailable ({error.retry_after:.1f}s)"
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/?t={time.time()}"
+
+    print("=== Testing a failing origin ===")
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(attempt, [url] * 10))
+    print(f"Every caller got the typed error: "
+          f"{all(r.startswith('unavailable') for r in results)}")
+    print(f"Origin hits for 10 concurrent callers: {origin_hits} "
+          "(should be 1)")
+
+    start = time.monotonic()
+    print(f"During the backoff: {attempt(url)}")
+    print(f"Answered without waiting: {time.monotonic() - start < 0.1}")
+    print(f"Origin hits: {origin_hits} (should be 1)")
+
+    print("\n=== Testing exponential backoff ===")
+    time.sleep(0.6)
+    print(f"Second failure: {attempt(url)} (should back off 1.0s)")
+    time.sleep(1.1)
+    print(f"Third failure: {attempt(url)} (should back off 2.0s)")
+    time.sleep(2.1)
+    print(f"Fourth failure: {attempt(url)} (capped at 2.0s)")
+
+    print("\n=== Testing recovery ===")
+    failing = False
+    time.sleep(2.1)
+    print(f"Origin back: {attempt(url)}")
+    print(f"Failure state cleared: "
+          f"{_redis.exists(f'fail:{url}', f'failures:{url}')} (should be 0)")
+
+    print("\n=== Testing the last good copy ===")
+    failing = True
+    _redis.pexpire(f"cache:{url}", 5000)
+    print(f"Stale copy while the origin fails: {attempt(url)}")
+    time.sleep(0.5)
+    hits = origin_hits
+    print(f"Still served: {attempt(url)}")
+    time.sleep(0.3)
+    print(f"Refresh backed off: {origin_hits == hits}")
+
+    server.shutdown()
+    print("\n✅ All tests completed!")
@@ -4,7 +4,7 @@ Test file for replay function
 """
 from exercise import Cache, replay
 
-cache = Cache()
+cache = Cache(flush=True)
 
 cache.store("foo")
 cache.store("bar")
@@ -6,7 +6,7 @@ from exercise import Cache, replay
 
 print("=== Testing replay function ===")
 
-cache = Cache()
+cache = Cache(flush=True)
 
 # Test with no calls first
 print("1. Testing with no calls:")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test file for the type-preserving TaggedSerializer
+"""
+from exercise import Cache
+from serializer import TaggedSerializer
+
+print("=== Testing TaggedSerializer ===")
+
+cache = Cache(namespace="test_serializer:", serializer=TaggedSerializer())
+cache.reset()
+
+values = [b"bytes", "string", 42, 2 ** 80, 3.14, True, None,
+          [1, "two", 3.0], (4, 5), {"nested": {"list": [b"x"]}}]
+for value in values:
+    result = cache.get(cache.store(value))
+    same = result == value and type(result) is type(value)
+    print(f"{value!r} -> {result!r} (match: {same})")
+
+keys = cache.store_many([1, "one"])
+print(f"get_many keeps types: {cache.get_many(keys)}")
+print(f"get_str and get_int still work: "
+      f"{cache.get_str(keys[1])!r} {cache.get_int(keys[0])!r}")
+print(f"get_str of numbers: {cache.get_str(cache.store(42))!r} "
+      f"{cache.get_str(cache.store(3.5))!r}")
+
+# Keys written by a raw Cache remain readable as bytes
+raw_key = Cache(namespace="test_serializer:").store("legacy")
+print(f"Legacy raw key reads back as: {cache.get(raw_key)!r}")
+
+try:
+    import numpy
+    array = numpy.arange(6, dtype="float32").reshape(2, 3)
+    restored = cache.get(cache.store(array))
+    print(f"numpy array round-trips: {(restored == array).all()}, "
+          f"dtype {restored.dtype}, shape {restored.shape}")
+    scalars = [cache.get(cache.store(value))
+               for value in (numpy.int64(3), numpy.float32(0.5),
+                             numpy.bool_(True))]
+    print(f"numpy scalars read back as Python values: {scalars!r}")
+    try:
+        cache.store(numpy.array([{"a": 1}, None], dtype=object))
+        print("Object array stored")
+    except TypeError as error:
+        print(f"Object array refused: {error}")
+except ImportError:
+    print("numpy not installed, skipping array test")
+
+cache.reset()
+print("\n✅ All tests completed!")
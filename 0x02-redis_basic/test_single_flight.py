@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test file for single-flight stampede protection in web.get_page
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web import (
+    get_page, get_access_count, _fetch_once, _http_get, _lock_timeout
+)
+
+origin_hits = 0
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Local origin that answers after a delay and counts its requests"""
+
+    def do_GET(self) -> None:
+        """Answer every GET with a small page after 0.5 seconds"""
+        global origin_hits
+        origin_hits += 1
+        time.sleep(0.5)
+        body = b"<html>slow page</html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet"""
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/?t={time.time()}"
+
+    print("=== Testing single-flight fetches ===")
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        pages = list(pool.map(get_page, [url] * 20))
+
+    print(f"All callers got the page: {all(p == pages[0] for p in pages)}")
+    print(f"Origin fetches for 20 concurrent misses: {origin_hits} "
+          "(should be 1)")
+    print(f"Access count: {get_access_count(url)} (should be 20)")
+
+    print("\n=== Testing the lock winner checks the cache again ===")
+    # As if this caller's lookup missed just before the page was stored
+    before = origin_hits
+    page = _fetch_once(_http_get, url, 10, 5.0, 5.0, 0.05)
+    print(f"Got the cached page: {page == pages[0]}, "
+          f"origin fetches: {origin_hits - before} (should be 0)")
+
+    print("\n=== Testing the lock outlives a slow fetch ===")
+    print(f"Default lock lifetime: {_lock_timeout()}s "
+          "(connect + read timeouts + 1)")
+
+    server.shutdown()
+    print("\n✅ All tests completed!")
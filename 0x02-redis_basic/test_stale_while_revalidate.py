@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test file for the stale-while-revalidate mode of cache_with_expiration
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import web
+from web import cache_with_expiration
+
+version = 0
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Local origin that answers after a delay with a new version"""
+
+    def do_GET(self) -> None:
+        """Answer every GET with the next page version after 1 second"""
+        global version
+        version += 1
+        time.sleep(1)
+        body = f"<html>version {version}</html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet"""
+
+
+@cache_with_expiration(1, stale=10)
+def get_slow_page(url: str) -> str:
+    """Fetch a page from the local origin"""
+    return requests.get(url).text
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/?t={time.time()}"
+
+    print("=== Testing stale-while-revalidate ===")
+    start = time.time()
+    page = get_slow_page.cached_page(url)
+    print(f"Miss: {page.content} in {time.time() - start:.2f}s")
+
+    time.sleep(1.5)
+    start = time.time()
+    page = get_slow_page.cached_page(url)
+    print(f"Stale hit: {page.content} in {time.time() - start:.3f}s, "
+          f"age {page.age:.1f}s, stale={page.stale}")
+
+    time.sleep(1.5)
+    page = get_slow_page.cached_page(url)
+    print(f"After background refresh: {page.content}, stale={page.stale}")
+
+    print("\n=== Testing repeated stale hits queue one refresh ===")
+    time.sleep(1.5)
+    before = version
+    for _ in range(50):
+        get_slow_page.cached_page(url)
+    print(f"Refreshes pending: {len(web._refreshing)} (should be 1)")
+    time.sleep(1.5)
+    print(f"Origin fetches: {version - before} (should be 1), "
+          f"pending after: {len(web._refreshing)}")
+
+    server.shutdown()
+    print("\n✅ All tests completed!")
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Test file for the store_many and get_many bulk methods
+"""
+from exercise import Cache, replay
+
+print("=== Testing store_many and get_many ===")
+
+cache = Cache(flush=True)
+
+values = [b"bytes", "string", 42, 3.14]
+keys = cache.store_many(values, chunk_size=3)
+print(f"Stored {len(keys)} values in chunks of 3")
+
+results = cache.get_many(keys)
+print(f"Values read back in order: {results}")
+
+results = cache.get_many(keys + ["missing"], fn=lambda d: d.decode("utf-8"))
+print(f"Decoded values (missing key is None): {results}")
+
+count = cache.get(cache.store.__qualname__)
+print(f"Call count from count_calls decorator: {count} (should be b'4')")
+
+print("\nReplay still lists every stored item:")
+replay(cache.store)
+
+print("\n✅ All tests completed!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test file for the Redis Streams call_history backend
+"""
+import io
+import time
+
+from exercise import Cache, ack_calls, iter_calls, read_calls, replay
+
+
+class StreamCache(Cache):
+    """Cache recording its call history in a stream"""
+
+    history_stream = True
+
+
+print("=== Testing stream entries ===")
+cache = StreamCache(flush=True)
+cache.store("first")
+time.sleep(0.01)
+middle = time.time()
+time.sleep(0.01)
+cache.store("second")
+cache.store_many(["third", "fourth"])
+
+calls = list(iter_calls(cache.store))
+print(f"Entries: {[call['args'] for call in calls]}")
+print(f"Outputs are the keys: {cache.get(calls[0]['output'])}")
+print(f"Single store has a client time: "
+      f"{calls[0]['client_time'] is not None}")
+print(f"Bulk store has no client time: {calls[2]['client_time'] is None}")
+paged = [call["id"] for call in iter_calls(cache.store, chunk=2)]
+print(f"Small pages give the same entries: "
+      f"{paged == [call['id'] for call in calls]}")
+
+print("\n=== Testing time windows ===")
+after = [call["args"] for call in iter_calls(cache.store, since=middle)]
+print(f"Calls since the middle: {len(after)} (should be 3)")
+before = [call["args"] for call in iter_calls(cache.store, until=middle)]
+print(f"Calls until the middle: {before} (should be the first)")
+
+print("\n=== Testing replay ===")
+out = io.StringIO()
+replay(cache.store, file=out)
+print(out.getvalue().splitlines()[0])
+out = io.StringIO()
+replay(cache.store, file=out, since=middle, last=2)
+for line in out.getvalue().splitlines():
+    print(line.split(" -> ")[0])
+
+print("\n=== Testing consumer groups ===")
+batch = read_calls(cache.store, "analyzers", "a1", count=3)
+rest = read_calls(cache.store, "analyzers", "a2", count=10)
+print(f"Consumers split the calls: {len(batch)} + {len(rest)} "
+      "(should be 3 + 1)")
+acked = ack_calls(cache.store, "analyzers", [call["id"] for call in batch])
+print(f"Acknowledged: {acked} (should be 3)")
+print(f"Nothing new: {read_calls(cache.store, 'analyzers', 'a1')}")
+cache.store("sixth")
+delivered = read_calls(cache.store, "analyzers", "a1")
+print(f"New call delivered: {[call['args'] for call in delivered]}")
+
+print("\n=== Testing approximate capping ===")
+
+
+class CappedCache(StreamCache):
+    """Stream history capped to about 100 entries"""
+
+    history_maxlen = 100
+
+
+capped = CappedCache(namespace="capped:")
+capped.reset()
+capped.store_many(range(1000), chunk_size=50)
+length = capped._redis.xlen(capped._key("Cache.store:calls"))
+print(f"Stream stays near the cap: {100 <= length < 300}")
+capped.reset()
+
+print("\n✅ All tests completed!")
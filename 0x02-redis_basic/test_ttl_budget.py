@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test file for per-key TTLs and the memory budget mode
+"""
+import time
+
+from exercise import Cache
+
+print("=== Testing per-key TTL ===")
+cache = Cache(flush=True)
+key = cache.store("short lived", ttl=1)
+forever = cache.store("kept")
+print(f"TTL set: {cache._redis.ttl(key)} (should be 1)")
+print(f"No TTL by default: {cache._redis.ttl(forever)} (should be -1)")
+keys = cache.store_many(["a", "b"], ttl=30)
+print(f"store_many TTLs: {[cache._redis.ttl(k) for k in keys]}")
+time.sleep(1.1)
+print(f"Expired value: {cache.get(key)} (should be None)")
+
+
+class Expiring(Cache):
+    """Cache whose values expire after a minute by default"""
+
+    default_ttl = 60
+
+
+expiring = Expiring()
+print(f"Class default TTL: {expiring._redis.ttl(expiring.store('x'))} "
+      "(should be 60)")
+
+
+class SmallChunks(Expiring):
+    """Chunked values with the default TTL"""
+
+    chunk_size = 4
+
+
+chunked = SmallChunks().store(b"0123456789")
+print(f"Chunks outlive the manifest: "
+      f"{SmallChunks()._redis.ttl(chunked + ':chunk:0')} (should be 61)")
+
+print("\n=== Testing the oldest-first budget ===")
+
+
+class Oldest(Cache):
+    """Cache keeping at most 100 bytes, evicting the first stored"""
+
+    memory_budget = 100
+    eviction = "oldest"
+
+
+oldest = Oldest(namespace="oldest:")
+oldest.reset()
+stored = [oldest.store(b"x" * 30) for _ in range(5)]
+print(f"Usage: {oldest.memory_usage()}")
+print(f"Surviving values: {[oldest.get(k) is not None for k in stored]} "
+      "(should be the last 3)")
+oldest.delete(stored[-1])
+print(f"Usage after delete: {oldest.memory_usage()['bytes']} (should be 60)")
+oldest.reset()
+
+print("\n=== Testing the LRU budget ===")
+
+
+class Lru(Cache):
+    """Cache keeping at most 100 bytes, evicting the least recently read"""
+
+    memory_budget = 100
+
+
+lru = Lru(namespace="lru:")
+lru.reset()
+first, second, third = [
+    lru.store(value) for value in (b"a" * 30, b"b" * 30, b"c" * 30)
+]
+lru.get(first)
+fourth = lru.store(b"d" * 30)
+survivors = [lru.get(k) is not None for k in (first, second, third, fourth)]
+print(f"Read value kept, unread one evicted: {survivors} "
+      "(should be True, False, True, True)")
+big = lru.store(bytearray(b"z" * 250))
+print(f"A value over the whole budget is evicted too: {lru.get(big)}")
+print(f"Usage: {lru.memory_usage()}")
+lru.reset()
+
+print("\n=== Testing dedup restrictions ===")
+try:
+    Cache(dedup=True).store("x", ttl=5)
+except ValueError as e:
+    print(f"Rejected: {e}")
+
+print("\n✅ All tests completed!")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test file for the warm.py cache warm-up command (local HTTP servers)
+"""
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web import _redis, hot_urls
+
+requests_seen = []
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """Local origin recording when each request arrives"""
+
+    def do_GET(self) -> None:
+        """Answer every GET with a small page"""
+        requests_seen.append((self.server.server_port, time.monotonic()))
+        body = b"<html>warm</html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet"""
+
+
+def serve() -> ThreadingHTTPServer:
+    """Start a local origin on a free port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    first, second = serve(), serve()
+    run = time.time()
+    urls = [f"http://127.0.0.1:{server.server_port}/{i}?t={run}"
+            for server in (first, second) for i in range(5)]
+    listing = "# warm-up list\n" + "\n".join(urls + [urls[0], ""]) + "\n"
+
+    print("=== Testing a cold warm-up ===")
+    start = time.monotonic()
+    done = subprocess.run(
+        [sys.executable, "warm.py", "--concurrency", "10", "--rate", "10"],
+        input=listing, capture_output=True, text=True
+    )
+    print(done.stdout.splitlines()[0].split(" in ")[0] + " ...")
+    print(done.stdout.splitlines()[0].split(": ")[1])
+    print(f"Every page cached: "
+          f"{all(_redis.exists(f'cache:{url}') for url in urls)}")
+    gaps = []
+    for port in (first.server_port, second.server_port):
+        times = sorted(t for p, t in requests_seen if p == port)
+        gaps.extend(b - a for a, b in zip(times, times[1:]))
+    print(f"Requests per host spaced by the rate limit: "
+          f"{min(gaps) > 0.08}")
+    print(f"Hosts fetched in parallel: {time.monotonic() - start < 1.0}")
+    print(f"Accesses not counted: "
+          f"{not any(_redis.exists(f'count:{url}') for url in urls)}")
+    hot = {url for url, _ in hot_urls(100, minutes=1)}
+    print(f"Hot URLs untouched: {hot.isdisjoint(urls)}")
+
+    print("\n=== Testing a warm re-run ===")
+    seen = len(requests_seen)
+    done = subprocess.run([sys.executable, "warm.py"], input=listing,
+                          capture_output=True, text=True)
+    print(done.stdout.splitlines()[0].split(": ")[1])
+    print(done.stdout.splitlines()[1].split(", ")[1])
+    print(f"Origin untouched: {len(requests_seen) == seen}")
+
+    first.shutdown()
+    second.shutdown()
+    print("\n✅ All tests completed!")
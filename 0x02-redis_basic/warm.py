@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Cache warm-up command for web.get_page
+
+Reads URLs (one per line, blank lines and # comments ignored) from a file
+or standard input, skips the ones whose cache entry is still fresh, and
+fetches the rest through get_page with bounded concurrency and a per-host
+rate limit, then prints a throughput and hit-rate summary.
+
+    python3 warm.py urls.txt --concurrency 16 --rate 5
+    cat urls.txt | python3 warm.py --min-ttl 3
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, IO, Iterable, List
+from urllib.parse import urlsplit
+
+import web
+from exercise import _chunked
+
+
+class HostLimiter:
+    """
+    Spaces out requests to each host to at most ``rate`` per second.
+
+    Each call reserves the next free slot of its host under a lock, then
+    sleeps until that slot outside of it, so requests to different hosts
+    never wait on each other.
+    """
+
+    def __init__(self, rate: float) -> None:
+        """
+        Initialize the HostLimiter instance.
+
+        Args:
+            rate: Requests per second per host, or 0 for no limit.
+        """
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        """
+        Block until a request to the host of ``url`` is allowed.
+
+        Args:
+            url: The URL about to be fetched.
+        """
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_urls(source: IO[str]) -> List[str]:
+    """
+    Read the distinct URLs of a list, in order.
+
+    Args:
+        source: The file-like object listing one URL per line.
+
+    Returns:
+        List[str]: The URLs, without blanks, comments or duplicates.
+    """
+    urls = (line.strip() for line in source)
+    return list(dict.fromkeys(
+        url for url in urls if url and not url.startswith("#")
+    ))
+
+
+def stale_urls(urls: Iterable[str], min_ttl: int,
+               chunk: int = 1000) -> List[str]:
+    """
+    Find the URLs whose cache entry is missing or about to expire.
+
+    The TTL of every cache entry is read with one pipelined round trip
+    per ``chunk`` URLs (TTL answers -2 for a missing key).
+
+    Args:
+        urls: The URLs to check.
+        min_ttl: Entries with more seconds to live than this are fresh.
+        chunk: The maximum number of TTL commands per round trip.
+
+    Returns:
+        List[str]: The URLs to fetch, in order.
+    """
+    stale: List[str] = []
+    for batch in _chunked(urls, chunk):
+        pipe = web._redis.pipeline(transaction=False)
+        for url in batch:
+            pipe.ttl(f"cache:{url}")
+        stale.extend(url for url, ttl in zip(batch, pipe.execute())
+                     if ttl != -1 and ttl <= min_ttl)
+    return stale
+
+
+def warm(urls: List[str], concurrency: int = 8, rate: float = 0,
+         min_ttl: int = 1) -> Dict[str, float]:
+    """
+    Fill the page cache for a list of URLs.
+
+    Args:
+        urls: The URLs to warm up.
+        concurrency: The maximum number of fetches in flight.
+        rate: Requests per second per host, or 0 for no limit.
+        min_ttl: Entries with more seconds to live than this are skipped.
+
+    Returns:
+        Dict[str, float]: The ``urls``, ``skipped`` (fresh), ``hits``
+        (cached by someone else meanwhile), ``fetched`` and ``failed``
+        counts, the ``seconds`` taken and the ``hit_rate``.
+    """
+    start = time.monotonic()
+    todo = stale_urls(urls, min_ttl)
+    limiter = HostLimiter(rate)
+    outcomes = {"hits": 0, "fetched": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def fetch(url: str) -> None:
+        limiter.wait(url)
+        try:
+            # Warming must not count as demand for the page
+            page = web.get_page.cached_page(url, count=False)
+            outcome = "hits" if page.age > 0 or page.stale else "fetched"
+        except Exception as error:
+            print(f"{url}: {error}", file=sys.stderr)
+            outcome = "failed"
+        with lock:
+            outcomes[outcome] += 1
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(fetch, todo))
+
+    skipped = len(urls) - len(todo)
+    summary: Dict[str, float] = {"urls": len(urls), "skipped": skipped}
+    summary.update(outcomes)
+    summary["seconds"] = time.monotonic() - start
+    summary["hit_rate"] = ((skipped + outcomes["hits"]) / len(urls)
+                           if urls else 0.0)
+    return summary
+
+
+def main() -> int:
+    """Run the warm-up from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", nargs="?", default="-",
+                        help="file listing one URL per line (default: stdin)")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="fetches in flight (default: 8)")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="requests per second per host "
+                             "(default: 0, unlimited)")
+    parser.add_argument("--min-ttl", type=int, default=1,
+                        help="skip entries with more seconds to live "
+                             "(default: 1)")
+    args = parser.parse_args()
+
+    if args.file == "-":
+        urls = read_urls(sys.stdin)
+    else:
+        with open(args.file) as f:
+            urls = read_urls(f)
+
+    summary = warm(urls, args.concurrency, args.rate, args.min_ttl)
+    fetched = summary["hits"] + summary["fetched"] + summary["failed"]
+    print(f"{summary['urls']} URLs in {summary['seconds']:.2f}s: "
+          f"{summary['skipped']} fresh, {summary['fetched']} fetched, "
+          f"{summary['hits']} already cached, {summary['failed']} failed")
+    throughput = fetched / summary["seconds"] if summary["seconds"] else 0.0
+    print(f"Throughput: {throughput:.1f} URLs/s, "
+          f"hit rate: {summary['hit_rate']:.1%}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,55 +6,1034 @@ This module implements a web cache with expiration and request tracking
 using Redis for storage.
 """
 
+import time
+import uuid
+import zlib
+import atexit
 import redis
 import requests
 import functools
-from typing import Callable, Optional, Union, cast
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import (
+    Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union,
+    cast
+)
 
 
 # Global Redis instance
 _redis = redis.Redis()
 
+# Deletes a single-flight lock only if it still holds the caller's token
+_release_lock = _redis.register_script(
+    """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("DEL", KEYS[1])
+    end
+    return 0
+    """
+)
+
+# Lua function counting ``amount`` accesses to a URL: its counter expires
+# ``ttl`` seconds later, and the per-minute hot URL bucket keeps between
+# ``size`` and twice ``size`` of the most accessed URLs for ``hot_ttl``
+_COUNT_ACCESS = """
+local function count_access(count_key, ttl, hot_key, url, hot_ttl, size,
+                            amount)
+    redis.call("INCRBY", count_key, amount)
+    redis.call("EXPIRE", count_key, ttl)
+    redis.call("ZINCRBY", hot_key, amount, url)
+    redis.call("EXPIRE", hot_key, hot_ttl)
+    size = tonumber(size)
+    if redis.call("ZCARD", hot_key) > 2 * size then
+        redis.call("ZREMRANGEBYRANK", hot_key, 0, -size - 1)
+    end
+end
+"""
+
+# Reads a cached page with its remaining lifetime and, on a hit, counts the
+# access (ARGV[2] == "1") in KEYS[2] and KEYS[3]. On a miss, reports the
+# failure recorded in KEYS[4] (if given), if any.
+_lookup_page = _redis.register_script(
+    _COUNT_ACCESS + """
+    local page = redis.call("GET", KEYS[1])
+    if not page then
+        if KEYS[4] then
+            local reason = redis.call("GET", KEYS[4])
+            if reason then
+                return {false, redis.call("PTTL", KEYS[4]), reason}
+            end
+        end
+        return {}
+    end
+    local remaining = redis.call("PTTL", KEYS[1])
+    if ARGV[2] == "1" then
+        count_access(KEYS[2], ARGV[1], KEYS[3], ARGV[3], ARGV[4], ARGV[5], 1)
+    end
+    return {page, remaining}
+    """
+)
+
+# Caches a page (ARGV[2]) and its validators (ARGV[7:] as field/value
+# pairs) for ARGV[1] seconds, clears the failure state in KEYS[5:] and,
+# if ARGV[3] == "1", counts the access in KEYS[3] and KEYS[4]
+_store_and_count = _redis.register_script(
+    _COUNT_ACCESS + """
+    redis.call("SETEX", KEYS[1], ARGV[1], ARGV[2])
+    redis.call("DEL", KEYS[2])
+    if #ARGV > 6 then
+        redis.call("HSET", KEYS[2], unpack(ARGV, 7))
+        redis.call("EXPIRE", KEYS[2], ARGV[1])
+    end
+    if ARGV[3] == "1" then
+        count_access(KEYS[3], ARGV[1], KEYS[4], ARGV[4], ARGV[5], ARGV[6], 1)
+    end
+    for i = 5, #KEYS do
+        redis.call("DEL", KEYS[i])
+    end
+    return 1
+    """
+)
+
+# Counts ARGV[5] accesses to the URL ARGV[2] in KEYS[1] and KEYS[2]
+_count_accesses = _redis.register_script(
+    _COUNT_ACCESS + """
+    count_access(KEYS[1], ARGV[1], KEYS[2], ARGV[2], ARGV[3], ARGV[4],
+                 ARGV[5])
+    return 1
+    """
+)
+
+# Records one more consecutive failure of a URL (KEYS[2]) and stores the
+# reason (ARGV[1]) as a negative entry (KEYS[1]) living ARGV[2] ms doubled
+# per consecutive failure, up to ARGV[3] ms; returns that lifetime
+_record_failure = _redis.register_script(
+    """
+    local streak = redis.call("INCR", KEYS[2])
+    local limit = tonumber(ARGV[3])
+    redis.call("PEXPIRE", KEYS[2], limit * 2)
+    local backoff = math.floor(
+        math.min(tonumber(ARGV[2]) * 2 ^ (streak - 1), limit))
+    redis.call("SET", KEYS[1], ARGV[1], "PX", math.max(backoff, 1))
+    return backoff
+    """
+)
+
+
+# Background threads refreshing stale pages, created on first use
+_refresher: Optional[ThreadPoolExecutor] = None
+
+# URLs with a background refresh queued or running in this process
+_refreshing: Set[str] = set()
+_refreshing_lock = threading.Lock()
+
+# Shared HTTP session with pooled keep-alive connections
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_pool_size = 10
+_timeout: Tuple[float, float] = (3.05, 10.0)
+
+# Validators of the page being fetched by cache_with_expiration, if any
+_validators: contextvars.ContextVar = contextvars.ContextVar(
+    "validators", default=None
+)
+
+
+# Pages of at least this many bytes are compressed (None disables it)
+_compress_threshold: Optional[int] = None
+_compress_level = 6
+_compression_stats = {
+    "pages_compressed": 0,
+    "pages_decompressed": 0,
+    "bytes_in": 0,
+    "bytes_stored": 0,
+    "compress_seconds": 0.0,
+    "decompress_seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+# Codec header: a NUL byte, then the codec of the rest of the entry
+_CODEC_MARK = b"\x00"
+_CODEC_RAW = b"r"
+_CODEC_ZLIB = b"z"
+
+# Per-minute sorted sets of the most accessed URLs
+_hot_size = 100
+_hot_minutes = 60
+
+
+class _CounterBuffer:
+    """
+    In-process aggregator of "count:{url}" increments.
+
+    Increments are summed per URL and written in one pipeline by a
+    background thread, woken when ``threshold`` of them are pending and
+    at the latest every ``max_lag`` seconds.
+    """
+
+    def __init__(self, max_lag: float, threshold: int) -> None:
+        """
+        Initialize the buffer and start its flushing thread.
+
+        Args:
+            max_lag: Maximum delay in seconds before an increment is written
+            threshold: Number of pending increments that triggers a flush
+        """
+        self.max_lag = max_lag
+        self.threshold = threshold
+        self._pending: Dict[str, List[int]] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name="count-flusher", daemon=True)
+        self._thread.start()
+
+    def add(self, url: str, ttl: int) -> None:
+        """
+        Buffer one access to a URL.
+
+        Reaching the threshold only wakes the flushing thread, so the
+        caller never waits for, or fails on, the write to Redis.
+
+        Args:
+            url: The accessed URL
+            ttl: Expiration in seconds to set on its counter
+        """
+        with self._lock:
+            entry = self._pending.setdefault(url, [0, ttl])
+            entry[0] += 1
+            entry[1] = ttl
+            self._total += 1
+            full = self._total >= self.threshold
+        if full:
+            self._wake.set()
+
+    def pending(self, url: str) -> int:
+        """
+        Get the buffered, not yet written, accesses to a URL.
+
+        Args:
+            url: The URL to check
+
+        Returns:
+            Number of buffered accesses
+        """
+        with self._lock:
+            entry = self._pending.get(url)
+            return entry[0] if entry is not None else 0
+
+    def flush(self) -> None:
+        """
+        Write every buffered increment in one pipeline.
+
+        If Redis cannot be reached, the increments are put back in the
+        buffer for the next flush.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._total = 0
+        if not pending:
+            return
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            for url, (amount, ttl) in pending.items():
+                _queue_count(pipe, url, ttl, amount)
+            pipe.execute()
+        except redis.RedisError:
+            with self._lock:
+                for url, (amount, ttl) in pending.items():
+                    entry = self._pending.setdefault(url, [0, ttl])
+                    entry[0] += amount
+                    self._total += amount
+            raise
+
+    def _run(self) -> None:
+        """
+        Flush every ``max_lag`` seconds, or when woken, until stopped.
+        """
+        while not self._stopped.is_set():
+            self._wake.wait(self.max_lag)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            except redis.RedisError:
+                # Give Redis max_lag to recover before the next attempt
+                self._stopped.wait(self.max_lag)
+
+    def stop(self) -> None:
+        """
+        Stop the flushing thread and write what is left.
+        """
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+
+# Write-behind access counters, when enabled
+_counters: Optional[_CounterBuffer] = None
+
+
+def enable_write_behind(max_lag: float = 1.0, threshold: int = 1000) -> None:
+    """
+    Buffer access counter increments in process instead of writing each.
+
+    Counts are then written in batches, at most ``max_lag`` seconds late,
+    and once more when the process exits.
+
+    Args:
+        max_lag: Maximum delay in seconds before an access is counted in
+            Redis
+        threshold: Number of buffered accesses that triggers an early write
+    """
+    global _counters
+    disable_write_behind()
+    _counters = _CounterBuffer(max_lag, threshold)
+
+
+def disable_write_behind() -> None:
+    """
+    Write the buffered access counts and count synchronously again.
+    """
+    global _counters
+    counters, _counters = _counters, None
+    if counters is not None:
+        counters.stop()
+
+
+atexit.register(disable_write_behind)
+
+
+def configure_hot_urls(size: int = 100, minutes: int = 60) -> None:
+    """
+    Size the hot URL tracking done on every counted access.
+
+    Each minute of accesses is tallied in its own "hot:{minute}" sorted
+    set, trimmed back to its ``size`` most accessed URLs whenever it holds
+    twice as many, and kept for ``minutes`` minutes, so the tracking never
+    holds more than ``2 * size * minutes`` entries whatever the traffic.
+
+    Args:
+        size: URLs kept per minute, bounding how many hot_urls can report
+        minutes: How many minutes of buckets are kept
+    """
+    global _hot_size, _hot_minutes
+    if size < 1 or minutes < 1:
+        raise ValueError("size and minutes must be positive integers")
+    _hot_size = size
+    _hot_minutes = minutes
+
+
+def _hot_key(minute: Optional[int] = None) -> str:
+    """
+    Get the hot URL bucket of a minute.
+
+    Args:
+        minute: Minutes since the epoch (default: the current minute)
+
+    Returns:
+        The key of the minute's sorted set
+    """
+    if minute is None:
+        minute = int(time.time() // 60)
+    return f"hot:{minute}"
+
+
+def _hot_args() -> List[int]:
+    """
+    Get the hot URL settings passed to the counting scripts.
+
+    Returns:
+        The lifetime in seconds of a bucket and its size
+    """
+    return [_hot_minutes * 60 + 60, _hot_size]
 
-def cache_with_expiration(expiration: int = 10):
+
+def _queue_count(pipe: "redis.client.Pipeline", url: str, ttl: int,
+                 amount: int = 1) -> None:
+    """
+    Queue the script counting accesses to a URL on a pipeline.
+
+    Args:
+        pipe: The pipeline to queue the script on
+        url: The accessed URL
+        ttl: Expiration in seconds of the counter
+        amount: The number of accesses
+    """
+    _count_accesses(keys=[f"count:{url}", _hot_key()],
+                    args=[ttl, url, *_hot_args(), amount], client=pipe)
+
+
+def _count_access(url: str, ttl: int,
+                  pipe: Optional["redis.client.Pipeline"] = None) -> None:
+    """
+    Count one access to a URL, expiring its counter with the cache entry.
+
+    The increment is buffered when write-behind is enabled, queued on
+    ``pipe`` when given, and written in one round trip otherwise.
+
+    Args:
+        url: The accessed URL
+        ttl: Expiration in seconds of the counter
+        pipe: A pipeline the caller executes itself
+    """
+    if _counters is not None:
+        _counters.add(url, ttl)
+        return
+    client = pipe if pipe is not None else _redis.pipeline(transaction=False)
+    _queue_count(client, url, ttl)
+    if pipe is None:
+        client.execute()
+
+
+def hot_urls(n: int = 10, minutes: int = 5) -> List[Tuple[str, int]]:
+    """
+    Get the most accessed URLs of the last minutes.
+
+    The counts come from the per-minute buckets, summed server-side with
+    ZUNION; they are approximate for URLs that were trimmed from a bucket
+    while they were cold. Requires Redis 6.2 or later.
+
+    Args:
+        n: The number of URLs returned
+        minutes: How many minutes to look back, the current one included
+            (at most the tracked window)
+
+    Returns:
+        List[Tuple[str, int]]: (url, accesses) pairs, most accessed first
+    """
+    now = int(time.time() // 60)
+    keys = [_hot_key(now - i) for i in range(min(minutes, _hot_minutes))]
+    if not keys or n < 1:
+        return []
+    ranked = _redis.zunion(keys, withscores=True)
+    top = sorted(ranked, key=lambda entry: entry[1], reverse=True)[:n]
+    return [(url.decode("utf-8"), int(score)) for url, score in top]
+
+
+class NotModified(Exception):
+    """
+    Raised by a page fetch when the origin answers 304 Not Modified.
+
+    cache_with_expiration catches it during a conditional refresh and keeps
+    the cached copy, extending its lifetime.
+    """
+
+
+class OriginUnavailable(Exception):
+    """
+    Raised by get_page while a URL is backing off after origin failures.
+
+    Attributes:
+        url: The URL that failed
+        reason: A description of the last failure
+        retry_after: Seconds until the origin is tried again
+    """
+
+    def __init__(self, url: str, reason: str, retry_after: float) -> None:
+        """
+        Initialize the OriginUnavailable error.
+
+        Args:
+            url: The URL that failed
+            reason: A description of the last failure
+            retry_after: Seconds until the origin is tried again
+        """
+        super().__init__(f"{url} is unavailable ({reason}), "
+                         f"retrying in {retry_after:.1f}s")
+        self.url = url
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def configure_session(pool_size: int = 10,
+                      timeout: Tuple[float, float] = (3.05, 10.0)) -> None:
+    """
+    Configure the shared HTTP session used to fetch pages.
+
+    The current session, if any, is closed and replaced on next use.
+
+    Args:
+        pool_size: Maximum number of kept-alive connections per host
+        timeout: Connect and read timeouts in seconds
+    """
+    global _session, _pool_size, _timeout
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _pool_size = pool_size
+        _timeout = timeout
+
+
+def _lock_timeout(lock_timeout: Optional[float] = None) -> float:
+    """
+    Get the lifetime of a single-flight lock.
+
+    Args:
+        lock_timeout: An explicit lifetime in seconds, if any
+
+    Returns:
+        The explicit lifetime, or one covering the connect and read
+        timeouts of the shared session plus a second, so a slow fetch
+        keeps its lock until it times out
+    """
+    if lock_timeout is not None:
+        return lock_timeout
+    return sum(_timeout) + 1.0
+
+
+def _get_session() -> requests.Session:
+    """
+    Get the shared HTTP session, creating it on first use.
+
+    Returns:
+        requests.Session: The session, safe to share between threads
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=_pool_size,
+                                  pool_maxsize=_pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def configure_compression(threshold: Optional[int] = 1024,
+                          level: int = 6) -> None:
+    """
+    Configure compression of cached page bodies.
+
+    Entries are self-describing, so changing the settings never makes
+    existing entries unreadable.
+
+    Args:
+        threshold: Minimum size in bytes of a compressed page, or None to
+            store every page uncompressed
+        level: zlib compression level, from 1 (fastest) to 9 (smallest)
+    """
+    global _compress_threshold, _compress_level
+    _compress_threshold = threshold
+    _compress_level = level
+
+
+def compression_stats() -> Dict[str, Union[int, float]]:
+    """
+    Get the compression counters of this process.
+
+    Returns:
+        Dict[str, Union[int, float]]: The number of pages compressed and
+        decompressed, the bytes given and stored for compressed pages, the
+        bytes saved, and the seconds spent compressing and decompressing
+    """
+    with _stats_lock:
+        stats: Dict[str, Union[int, float]] = dict(_compression_stats)
+    stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_stored"]
+    return stats
+
+
+def _encode_page(result: str) -> bytes:
+    """
+    Encode a page for storage, compressing it above the threshold.
+
+    Plain UTF-8 is stored as before; only compressed pages, and the rare
+    page starting with a NUL byte, get a codec header.
+
+    Args:
+        result: HTML content as string
+
+    Returns:
+        bytes: The entry to store
+    """
+    raw = result.encode("utf-8")
+    if _compress_threshold is not None and len(raw) >= _compress_threshold:
+        start = time.perf_counter()
+        packed = zlib.compress(raw, _compress_level)
+        packed = _CODEC_MARK + _CODEC_ZLIB + packed
+        elapsed = time.perf_counter() - start
+        if len(packed) < len(raw):
+            with _stats_lock:
+                _compression_stats["pages_compressed"] += 1
+                _compression_stats["bytes_in"] += len(raw)
+                _compression_stats["bytes_stored"] += len(packed)
+                _compression_stats["compress_seconds"] += elapsed
+            return packed
+    if raw.startswith(_CODEC_MARK):
+        return _CODEC_MARK + _CODEC_RAW + raw
+    return raw
+
+
+def _decode_page(entry: bytes) -> str:
+    """
+    Decode a stored page, whatever codec it was stored with.
+
+    Args:
+        entry: The stored entry
+
+    Returns:
+        HTML content as string
+    """
+    if not entry.startswith(_CODEC_MARK):
+        return entry.decode("utf-8")
+    codec, payload = entry[1:2], entry[2:]
+    if codec == _CODEC_ZLIB:
+        start = time.perf_counter()
+        raw = zlib.decompress(payload)
+        elapsed = time.perf_counter() - start
+        with _stats_lock:
+            _compression_stats["pages_decompressed"] += 1
+            _compression_stats["decompress_seconds"] += elapsed
+        return raw.decode("utf-8")
+    return payload.decode("utf-8")
+
+
+def _http_get(url: str) -> str:
+    """
+    Fetch a page over the shared session.
+
+    When cache_with_expiration is refreshing a page, the stored ETag and
+    Last-Modified validators are sent as If-None-Match/If-Modified-Since
+    and a 304 answer raises NotModified; the validators of a full answer
+    are recorded so the cache can store them.
+
+    Args:
+        url: The URL to fetch
+
+    Returns:
+        HTML content as string
+
+    Raises:
+        requests.HTTPError: If the origin answers with an error status
+    """
+    validators = _validators.get()
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    response = _get_session().get(url, headers=headers, timeout=_timeout)
+    if response.status_code == 304 and headers:
+        raise NotModified(url)
+    # Error answers are failures, not pages to cache
+    response.raise_for_status()
+    if validators is not None:
+        validators.clear()
+        for name, header in (("etag", "ETag"),
+                             ("last_modified", "Last-Modified")):
+            if response.headers.get(header):
+                validators[name] = response.headers[header]
+    return response.text
+
+
+def _call_origin(method: Callable, url: str,
+                 validators: Dict[str, str]) -> str:
+    """
+    Call the page function with validators exposed to _http_get.
+
+    Args:
+        method: The function fetching the page from the origin.
+        url: The URL to fetch
+        validators: The stored validators, updated in place with those of
+            the new answer
+
+    Returns:
+        HTML content as string
+    """
+    token = _validators.set(validators)
+    try:
+        return method(url)
+    finally:
+        _validators.reset(token)
+
+
+def _counted_in_script(url: str, ttl: int) -> bool:
+    """
+    Decide whether a script should count an access itself.
+
+    With write-behind enabled the access is buffered here instead.
+
+    Args:
+        url: The accessed URL
+        ttl: Expiration in seconds of the counter
+
+    Returns:
+        bool: True if the script has to increment the counter
+    """
+    if _counters is not None:
+        _counters.add(url, ttl)
+        return False
+    return True
+
+
+def _lookup(url: str, ttl: int,
+            count: bool = True) -> Tuple[Optional[bytes], int]:
+    """
+    Read a cached page and count the access on a hit, in one round trip.
+
+    Args:
+        url: The URL of the page
+        ttl: Expiration in seconds of the access counter
+        count: Whether a hit counts as an access
+
+    Returns:
+        Tuple[Optional[bytes], int]: The cache entry (None on a miss) and
+        its remaining lifetime in milliseconds
+
+    Raises:
+        OriginUnavailable: If the page is missing and the URL is backing
+            off after a failure
+    """
+    found = _lookup_page(
+        keys=[f"cache:{url}", f"count:{url}", _hot_key(), f"fail:{url}"],
+        args=[ttl, int(count and _counters is None), url, *_hot_args()]
+    )
+    if not found:
+        return None, -2
+    if found[0] is None:
+        raise OriginUnavailable(url, found[2].decode("utf-8"),
+                                max(found[1], 0) / 1000)
+    if count and _counters is not None:
+        _counters.add(url, ttl)
+    return found[0], found[1]
+
+
+def _fail(url: str, error: Exception, backoff: float,
+          max_backoff: float) -> OriginUnavailable:
+    """
+    Record a failed origin fetch as a short-lived negative cache entry.
+
+    Args:
+        url: The URL that failed
+        error: What the fetch raised
+        backoff: Seconds of backoff after a first failure, doubled for
+            each consecutive one
+        max_backoff: The longest backoff in seconds
+
+    Returns:
+        OriginUnavailable: The error to raise to the caller
+    """
+    reason = f"{type(error).__name__}: {error}"[:200]
+    delay = _record_failure(keys=[f"fail:{url}", f"failures:{url}"],
+                            args=[reason, int(backoff * 1000),
+                                  int(max_backoff * 1000)])
+    return OriginUnavailable(url, reason, delay / 1000)
+
+
+def _queue_page(pipe: "redis.client.Pipeline", url: str, result: str,
+                ttl: int, validators: Dict[str, str],
+                count: bool = False) -> None:
+    """
+    Queue the script caching a page and its validators on a pipeline.
+
+    Args:
+        pipe: The pipeline to queue the script on (a client runs it at
+            once)
+        url: The URL of the page
+        result: HTML content as string
+        ttl: Lifetime in seconds of the cache entry
+        validators: The ETag and Last-Modified of the answer, if any
+        count: Whether the script also counts one access
+    """
+    args: List[Union[int, str, bytes]] = [ttl, _encode_page(result),
+                                          int(count), url, *_hot_args()]
+    for name, value in validators.items():
+        args.extend((name, value))
+    _store_and_count(keys=[f"cache:{url}", f"meta:{url}", f"count:{url}",
+                           _hot_key(), f"fail:{url}", f"failures:{url}"],
+                     args=args, client=pipe)
+
+
+def _store_page(url: str, result: str, ttl: int,
+                validators: Dict[str, str], count: bool = False) -> None:
+    """
+    Cache a page and its validators with the same lifetime.
+
+    Args:
+        url: The URL of the page
+        result: HTML content as string
+        ttl: Lifetime in seconds of the cache entry
+        validators: The ETag and Last-Modified of the answer, if any
+        count: Whether to count one access atomically with the write
+    """
+    _queue_page(_redis, url, result, ttl, validators, count)
+
+
+class CachedPage(NamedTuple):
+    """
+    A page served by cache_with_expiration, with its freshness.
+
+    Attributes:
+        content: HTML content as string
+        age: Seconds since the cached copy was fetched or revalidated
+        stale: Whether the copy is older than the expiration time and was
+            returned while a background refresh runs
+    """
+
+    content: str
+    age: float
+    stale: bool
+
+
+def _refresh_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool running background refreshes of stale pages.
+
+    Returns:
+        ThreadPoolExecutor: The shared executor
+    """
+    global _refresher
+    if _refresher is None:
+        _refresher = ThreadPoolExecutor(max_workers=4,
+                                        thread_name_prefix="page-refresh")
+    return _refresher
+
+
+def _schedule_refresh(method: Callable, url: str, ttl: int,
+                      lock_timeout: float, backoff: float = 0,
+                      max_backoff: float = 60.0) -> None:
+    """
+    Queue a background refresh of a stale page, unless one is pending.
+
+    A hot URL served stale sees many requests before its refresh is done;
+    only the first queues a task, so the queue stays bounded by the number
+    of stale URLs and the others cost no Redis command.
+
+    Args:
+        method: The function fetching the page from the origin.
+        url: The URL to fetch
+        ttl: Lifetime in seconds of the refreshed cache entry
+        lock_timeout: Lifetime of the lock in seconds
+        backoff: Seconds of backoff after a first failure (0 disables it)
+        max_backoff: The longest backoff in seconds
+    """
+    with _refreshing_lock:
+        if url in _refreshing:
+            return
+        _refreshing.add(url)
+    try:
+        _refresh_executor().submit(_refresh, method, url, ttl, lock_timeout,
+                                   backoff, max_backoff)
+    except Exception:
+        with _refreshing_lock:
+            _refreshing.discard(url)
+        raise
+
+
+def _refresh(method: Callable, url: str, ttl: int, lock_timeout: float,
+             backoff: float = 0, max_backoff: float = 60.0) -> None:
+    """
+    Refetch a stale page in the background, once across processes.
+
+    If another caller already holds the single-flight lock, or the URL is
+    backing off after a failure, nothing is done. The request is
+    conditional on the stored validators, and a 304 answer only extends
+    the lifetime of the cached copy. If the origin fails, the stale copy
+    is kept until it expires and, with ``backoff`` set, the failure is
+    recorded so refreshes back off.
+
+    Args:
+        method: The function fetching the page from the origin.
+        url: The URL to fetch
+        ttl: Lifetime in seconds of the refreshed cache entry
+        lock_timeout: Lifetime of the lock in seconds
+        backoff: Seconds of backoff after a first failure (0 disables it)
+        max_backoff: The longest backoff in seconds
+    """
+    try:
+        if backoff and _redis.exists(f"fail:{url}"):
+            return
+        lock_key = f"lock:{url}"
+        token = uuid.uuid4().hex
+        if not _redis.set(lock_key, token, nx=True,
+                          px=int(lock_timeout * 1000)):
+            return
+        stored = _redis.hgetall(f"meta:{url}")
+        validators = {name.decode("utf-8"): value.decode("utf-8")
+                      for name, value in stored.items()}
+        try:
+            result = _call_origin(method, url, validators)
+            _store_page(url, result, ttl, validators)
+        except NotModified:
+            pipe = _redis.pipeline()
+            pipe.expire(f"cache:{url}", ttl)
+            pipe.expire(f"meta:{url}", ttl)
+            pipe.delete(f"fail:{url}", f"failures:{url}")
+            pipe.execute()
+        except Exception as error:
+            if backoff:
+                _fail(url, error, backoff, max_backoff)
+        finally:
+            _release_lock(keys=[lock_key], args=[token])
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(url)
+
+
+def _fetch_once(method: Callable, url: str, ttl: int,
+                lock_timeout: float, wait_timeout: float,
+                poll_interval: float, backoff: float = 0,
+                max_backoff: float = 60.0, count: bool = True) -> str:
+    """
+    Fetch a missing page with at most one caller per URL across processes.
+
+    The caller that wins a SET NX lock on "lock:{url}" checks the cache
+    again, then fetches the page and fills the cache; the others poll the
+    cache until it appears.
+    If it does not appear within ``wait_timeout`` (the fetcher died or is
+    too slow), a waiter falls back to fetching the page itself. Every
+    caller's access is counted (unless ``count`` is off) in the same
+    script call that stores or finds the page.
+
+    With ``backoff`` set, a failed fetch stores a negative entry in
+    "fail:{url}" for ``backoff`` seconds, doubled for each consecutive
+    failure up to ``max_backoff``; until it expires, callers (waiters
+    included) get OriginUnavailable without touching the origin.
+
+    Args:
+        method: The function fetching the page from the origin.
+        url: The URL to fetch
+        ttl: Lifetime in seconds of the cache entry
+        lock_timeout: Lifetime of the lock in seconds, bounding how long a
+            crashed fetcher can block the others
+        wait_timeout: How long in seconds a waiter polls for the result
+        poll_interval: Delay in seconds between two polls
+        backoff: Seconds of backoff after a first failure (0 disables
+            negative caching)
+        max_backoff: The longest backoff in seconds
+        count: Whether the call counts as an access to the URL
+
+    Returns:
+        HTML content as string
+
+    Raises:
+        OriginUnavailable: If the fetch failed and ``backoff`` is set
+    """
+    def fetch() -> str:
+        validators: Dict[str, str] = {}
+        try:
+            result = _call_origin(method, url, validators)
+        except Exception as error:
+            if not backoff:
+                raise
+            raise _fail(url, error, backoff, max_backoff) from error
+        _store_page(url, result, ttl, validators,
+                    count and _counted_in_script(url, ttl))
+        return result
+
+    lock_key = f"lock:{url}"
+    token = uuid.uuid4().hex
+
+    if _redis.set(lock_key, token, nx=True, px=int(lock_timeout * 1000)):
+        try:
+            # Another caller may have stored the page and released the
+            # lock since this caller's lookup missed
+            cached_result, _ = _lookup(url, ttl, count)
+            if cached_result is not None:
+                return _decode_page(cached_result)
+            return fetch()
+        finally:
+            _release_lock(keys=[lock_key], args=[token])
+
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        cached_result, _ = _lookup(url, ttl, count)
+        if cached_result is not None:
+            return _decode_page(cached_result)
+
+    # Fall back to the origin rather than failing the caller
+    return fetch()
+
+
+def cache_with_expiration(expiration: int = 10, stale: int = 0,
+                          lock_timeout: Optional[float] = None,
+                          wait_timeout: Optional[float] = None,
+                          poll_interval: float = 0.05,
+                          failure_backoff: float = 1.0,
+                          max_backoff: float = 60.0):
     """
     Decorator to cache function results with expiration time.
 
+    Concurrent misses for the same URL are coalesced: a single caller
+    across all processes fetches the origin while the others wait for its
+    result, so the origin sees at most one fetch per URL per expiration.
+
+    With ``stale`` set, entries are kept ``stale`` seconds past their
+    expiration (stale-while-revalidate): in that window the old page is
+    returned immediately and a background thread refreshes it. The age of
+    an entry is derived from its remaining TTL, read in the same round trip
+    as the page. The decorated function gets a ``cached_page(url,
+    count=True)`` attribute returning a CachedPage with the age and stale
+    flag; ``count=False`` fills or reads the cache without counting the
+    access, as a cache warm-up does.
+
+    Failed fetches (errors, timeouts and error statuses) are cached too:
+    for ``failure_backoff`` seconds, doubled per consecutive failure up to
+    ``max_backoff``, callers missing the page get OriginUnavailable at
+    once, and a stale copy is served without refresh attempts.
+
     Args:
         expiration: Cache expiration time in seconds (default: 10)
+        stale: Seconds past expiration during which the stale page is
+            served while it is refreshed (default: 0, disabled)
+        lock_timeout: Lifetime in seconds of the single-flight lock
+            (default: the session's connect and read timeouts plus one
+            second, so the lock outlives any fetch)
+        wait_timeout: How long in seconds a caller waits for another
+            caller's fetch before fetching itself (default: the lock's
+            lifetime)
+        poll_interval: Delay in seconds between two cache polls while
+            waiting
+        failure_backoff: Seconds a failure is cached before the origin is
+            tried again, doubled per consecutive failure (0 disables
+            negative caching)
+        max_backoff: The longest backoff in seconds
 
     Returns:
         Decorated function with caching capability
     """
 
-    def decorator(method: Callable) -> Callable:
-        @functools.wraps(method)
-        def wrapper(url: str) -> str:
-            # Create cache key
-            cache_key = f"cache:{url}"
-            count_key = f"count:{url}"
+    ttl = expiration + stale
 
-            # Try to get from cache first
-            cached_result = _redis.get(cache_key)
+    def decorator(method: Callable) -> Callable:
+        def cached_page(url: str, count: bool = True) -> CachedPage:
+            # Resolved per call, following configure_session
+            lock = _lock_timeout(lock_timeout)
+            wait = lock if wait_timeout is None else wait_timeout
+            # Read the page with its remaining lifetime, counting a hit
+            cached_result, remaining = _lookup(url, ttl, count)
             if cached_result is not None:
-                # Increment access counter and set expiration to match cache
-                _redis.incr(count_key)
-                _redis.expire(count_key, expiration)
-                # Type cast to bytes before decode since Redis returns bytes
-                return cast(bytes, cached_result).decode("utf-8")
-
-            # If not in cache, call the original function
-            result = method(url)
+                age = 0.0
+                if remaining >= 0:
+                    age = max(ttl * 1000 - remaining, 0) / 1000
+                is_stale = stale > 0 and age >= expiration
+                if is_stale:
+                    _schedule_refresh(method, url, ttl, lock,
+                                      failure_backoff, max_backoff)
+                content = _decode_page(cached_result)
+                return CachedPage(content, age, is_stale)
 
-            # Store in cache with expiration
-            _redis.setex(cache_key, expiration, result)
+            # If not in cache, fetch it once for all concurrent callers
+            result = _fetch_once(method, url, ttl, lock, wait,
+                                 poll_interval, failure_backoff,
+                                 max_backoff, count)
+            return CachedPage(result, 0.0, False)
 
-            # Increment access counter and set same expiration
-            _redis.incr(count_key)
-            _redis.expire(count_key, expiration)
-
-            return result
+        @functools.wraps(method)
+        def wrapper(url: str) -> str:
+            return cached_page(url).content
 
+        wrapper.cached_page = cached_page  # type: ignore[attr-defined]
         return wrapper
 
     return decorator
@@ -68,6 +1047,7 @@ def get_page(url: str) -> str:
     This function:
     - Tracks how many times a URL was accessed in "count:{url}"
     - Caches the result with 10 seconds expiration time
+    - Fetches over a shared, pooled HTTP session
     - Returns the HTML content of the URL
 
     Args:
@@ -76,22 +1056,122 @@ def get_page(url: str) -> str:
     Returns:
         HTML content as string
     """
-    response = requests.get(url)
-    return response.text
+    return _http_get(url)
 
 
-def get_access_count(url: str) -> int:
+def get_pages(urls: Iterable[str], max_workers: int = 8,
+              expiration: int = 10, failure_backoff: float = 1.0,
+              max_backoff: float = 60.0) -> List[Union[str, Exception]]:
+    """
+    Fetch many pages with caching and tracking, in two Redis round trips.
+
+    All cache lookups and "fail:{url}" negative entries go out in one
+    MGET, the distinct misses are fetched concurrently on a bounded thread
+    pool, and the new pages, their validators and every access count are
+    written in one pipeline. A failing URL does not affect the others: its
+    exception takes its place in the results and its count is not
+    incremented.
+
+    Failures are cached the way get_page caches them: a missing URL that
+    is backing off yields OriginUnavailable without touching the origin,
+    and a failed fetch records a negative entry and yields
+    OriginUnavailable.
+
+    Args:
+        urls: The URLs to fetch
+        max_workers: Maximum number of concurrent origin fetches
+        expiration: Cache expiration time in seconds (default: 10)
+        failure_backoff: Seconds a failure is cached before the origin is
+            tried again, doubled per consecutive failure (0 disables
+            negative caching)
+        max_backoff: The longest backoff in seconds
+
+    Returns:
+        List[Union[str, Exception]]: HTML content as string, or the error
+        raised while fetching it, in the same order as the URLs
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    entries = _redis.mget([f"cache:{url}" for url in urls]
+                          + [f"fail:{url}" for url in urls])
+    cached, failures = entries[:len(urls)], entries[len(urls):]
+    results: List[Union[str, Exception, None]] = [
+        None if entry is None else _decode_page(cast(bytes, entry))
+        for entry in cached
+    ]
+
+    # Missing URLs backing off after a failure are not fetched
+    backing_off = list(dict.fromkeys(
+        url for url, entry, reason in zip(urls, cached, failures)
+        if entry is None and reason is not None
+    )) if failure_backoff else []
+    fetched: Dict[str, Union[str, Exception]] = {}
+    if backing_off:
+        pipe = _redis.pipeline(transaction=False)
+        for url in backing_off:
+            pipe.pttl(f"fail:{url}")
+        reasons = dict(zip(urls, failures))
+        for url, remaining in zip(backing_off, pipe.execute()):
+            fetched[url] = OriginUnavailable(
+                url, cast(bytes, reasons[url]).decode("utf-8"),
+                max(remaining, 0) / 1000
+            )
+
+    # Fetch each missing URL once, however often it is listed
+    missing = list(dict.fromkeys(
+        url for url, result in zip(urls, results)
+        if result is None and url not in fetched
+    ))
+    validators: Dict[str, Dict[str, str]] = {url: {} for url in missing}
+    if missing:
+        fetch = get_page.__wrapped__  # type: ignore[attr-defined]
+
+        def fetch_one(url: str) -> Union[str, Exception]:
+            try:
+                return _call_origin(fetch, url, validators[url])
+            except Exception as error:
+                if not failure_backoff:
+                    return error
+                failure = _fail(url, error, failure_backoff, max_backoff)
+                failure.__cause__ = error
+                return failure
+
+        workers = min(max_workers, len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched.update(zip(missing, pool.map(fetch_one, missing)))
+
+    pipe = _redis.pipeline(transaction=False)
+    for url, result in fetched.items():
+        if not isinstance(result, Exception):
+            _queue_page(pipe, url, result, expiration, validators[url])
+    for index, url in enumerate(urls):
+        if results[index] is None:
+            results[index] = fetched[url]
+        if not isinstance(results[index], Exception):
+            _count_access(url, expiration, pipe)
+    pipe.execute()
+    return cast(List[Union[str, Exception]], results)
+
+
+def get_access_count(url: str, include_pending: bool = True) -> int:
     """
     Get the number of times a URL was accessed.
 
     Args:
         url: The URL to check
+        include_pending: Whether to add the accesses this process has
+            buffered but not yet written (write-behind mode)
 
     Returns:
         Number of times the URL was accessed
     """
     count = _redis.get(f"count:{url}")
-    return int(cast(bytes, count).decode("utf-8")) if count is not None else 0
+    total = int(cast(bytes, count).decode("utf-8")) if count is not None else 0
+    counters = _counters
+    if include_pending and counters is not None:
+        total += counters.pending(url)
+    return total
 
 
 # Alternative implementation without decorator (if needed)
@@ -105,26 +1185,21 @@ def get_page_simple(url: str) -> str:
     Returns:
         HTML content as string
     """
-    cache_key = f"cache:{url}"
-    count_key = f"count:{url}"
-
-    # Try to get from cache first
-    cached_result = _redis.get(cache_key)
-    if cached_result is not None:
-        # Increment access counter and set expiration to match cache
-        _redis.incr(count_key)
-        _redis.expire(count_key, 10)
-        return cast(bytes, cached_result).decode("utf-8")
+    # Read the page and count a hit in one round trip
+    cached_result = _lookup_page(
+        keys=[f"cache:{url}", f"count:{url}", _hot_key()],
+        args=[10, 1, url, *_hot_args()]
+    )
+    if cached_result:
+        return _decode_page(cached_result[0])
 
     # If not in cache, fetch from URL
-    response = requests.get(url)
-    result = response.text
-
-    # Store in cache with 10 seconds expiration
-    _redis.setex(cache_key, 10, result)
+    result = _http_get(url)
 
-    # Increment access counter and set same expiration
-    _redis.incr(count_key)
-    _redis.expire(count_key, 10)
+    # Store it for 10 seconds and count the access in one round trip
+    _store_and_count(
+        keys=[f"cache:{url}", f"meta:{url}", f"count:{url}", _hot_key()],
+        args=[10, _encode_page(result), 1, url, *_hot_args()]
+    )
 
     return result